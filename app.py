@@ -4,6 +4,8 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
+from db_routing import RoutingSession, replica_router, replica_binds
+from compression import CompressionMiddleware
 import logging
 
 # Configure logging
@@ -15,7 +17,13 @@ class Base(DeclarativeBase):
 # Initialize Flask app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "fallback_secret_for_development")
-app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+
+# Response compression for dynamic pages (brotli is used when installed)
+app.config['COMPRESSION_LEVEL'] = int(os.environ.get('COMPRESSION_LEVEL', 6))  # gzip 1-9
+app.config['COMPRESSION_BROTLI_QUALITY'] = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))  # 0-11
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('COMPRESSION_MIN_SIZE', 500))
+app.config['COMPRESSION_CACHE_ENTRIES'] = int(os.environ.get('COMPRESSION_CACHE_ENTRIES', 128))
+app.wsgi_app = ProxyFix(CompressionMiddleware.from_config(app.wsgi_app, app.config), x_proto=1, x_host=1)
 
 # Database configuration
 database_url = os.environ.get("DATABASE_URL")
@@ -30,8 +38,14 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_recycle": 300,
 }
 
+# Optional read replicas: comma-separated URLs, used by views marked @replica_reads
+app.config["SQLALCHEMY_BINDS"] = replica_binds(os.environ.get("REPLICA_DATABASE_URLS", ""))
+app.config['REPLICA_HEALTH_INTERVAL'] = float(os.environ.get('REPLICA_HEALTH_INTERVAL', 5))
+app.config['REPLICA_STICKY_SECONDS'] = float(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
 # Initialize extensions
-db = SQLAlchemy(app, model_class=Base)
+db = SQLAlchemy(app, model_class=Base, session_options={'class_': RoutingSession})
+replica_router.init_app(app, db)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -45,9 +59,74 @@ app.config['MAIL_USE_TLS'] = True
 app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_USERNAME')
+app.config['SITE_URL'] = os.environ.get('SITE_URL', 'http://localhost:5000')
+app.config['MAIL_TIMEOUT'] = int(os.environ.get('MAIL_TIMEOUT', 30))
+app.config['MAIL_MAX_MESSAGES_PER_CONNECTION'] = int(os.environ.get('MAIL_MAX_MESSAGES_PER_CONNECTION', 100))
+app.config['NEWSLETTER_CONCURRENCY'] = int(os.environ.get('NEWSLETTER_CONCURRENCY', 4))
+app.config['NEWSLETTER_RATE_LIMIT'] = float(os.environ.get('NEWSLETTER_RATE_LIMIT', 0))  # msgs/sec, 0 = unlimited
+app.config['NEWSLETTER_RESULT_TIMEOUT'] = int(os.environ.get('NEWSLETTER_RESULT_TIMEOUT', 300))  # give up on a stalled send
+app.config['CAMPAIGN_STALE_SECONDS'] = int(os.environ.get('CAMPAIGN_STALE_SECONDS', 600))
+app.config['EMAIL_LOG_CHUNK_SIZE'] = int(os.environ.get('EMAIL_LOG_CHUNK_SIZE', 500))
+
+# Background email job configuration
+app.config['JOBS_IN_PROCESS'] = os.environ.get('JOBS_IN_PROCESS', '1') == '1'
+app.config['JOBS_WORKER_THREADS'] = int(os.environ.get('JOBS_WORKER_THREADS', 1))
+app.config['JOBS_POLL_INTERVAL'] = float(os.environ.get('JOBS_POLL_INTERVAL', 2))
+app.config['JOBS_RETRY_BACKOFF'] = int(os.environ.get('JOBS_RETRY_BACKOFF', 30))
+app.config['JOBS_LOCK_TIMEOUT'] = int(os.environ.get('JOBS_LOCK_TIMEOUT', 900))
+
+# Page fragment cache configuration
+app.config['PAGE_CACHE_TTL'] = int(os.environ.get('PAGE_CACHE_TTL', 60))
+app.config['PAGE_CACHE_MAX_ENTRIES'] = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 256))
+app.config['PAGE_CACHE_SYNC_SECONDS'] = float(os.environ.get('PAGE_CACHE_SYNC_SECONDS', 5))  # cross-process invalidation delay
+
+# RSS/Atom feeds: rendered once per publish, kept at most FEED_CACHE_TTL seconds per process
+app.config['FEED_CACHE_TTL'] = int(os.environ.get('FEED_CACHE_TTL', 300))
+app.config['FEED_MAX_AGE'] = int(os.environ.get('FEED_MAX_AGE', 300))  # Cache-Control for clients/proxies
+app.config['FEED_MAX_ITEMS'] = int(os.environ.get('FEED_MAX_ITEMS', 20))
+
+# Logged-in user cache; the optional session snapshot lets requests skip the users table
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+app.config['USER_CACHE_MAX_ENTRIES'] = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 1024))
+app.config['USER_SESSION_SNAPSHOT'] = os.environ.get('USER_SESSION_SNAPSHOT', '0') == '1'
+app.config['USER_CACHE_SYNC_SECONDS'] = float(os.environ.get('USER_CACHE_SYNC_SECONDS', 5))  # how soon other workers see user changes
+
+# Fingerprinted static assets (built by `flask assets-build`)
+app.config['ASSET_MAX_AGE'] = int(os.environ.get('ASSET_MAX_AGE', 31536000))
+
+# Request instrumentation: share of requests timed (0 disables the hooks entirely)
+app.config['METRICS_SAMPLE_RATE'] = float(os.environ.get('METRICS_SAMPLE_RATE', 1.0))
+app.config['SERVER_TIMING_HEADER'] = os.environ.get('SERVER_TIMING_HEADER', '0') == '1'  # admins always get it
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')  # bearer token for /metrics scrapers
+
+# On-demand profiling: admins add ?__profile=1; PROFILE_SAMPLE_RATE profiles a share of all requests
+app.config['PROFILE_SAMPLE_RATE'] = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR')  # default: <instance>/profiles
+app.config['PROFILE_MAX_FILES'] = int(os.environ.get('PROFILE_MAX_FILES', 50))
+app.config['PROFILE_MAX_BYTES'] = int(os.environ.get('PROFILE_MAX_BYTES', 50 * 1024 * 1024))
+
+# Admin listings: also estimate the total row count (one extra query per page, at most once a minute)
+app.config['PAGINATION_APPROXIMATE_TOTALS'] = os.environ.get('PAGINATION_APPROXIMATE_TOTALS', '0') == '1'
+
+# Admin statistics cache lifetime
+app.config['STATS_CACHE_SECONDS'] = float(os.environ.get('STATS_CACHE_SECONDS', 5))
+
+# How often each worker checks whether site settings changed
+app.config['SETTINGS_RELOAD_SECONDS'] = float(os.environ.get('SETTINGS_RELOAD_SECONDS', 5))
+
+# Article view counter buffering
+app.config['VIEW_COUNTER_FLUSH_INTERVAL'] = float(os.environ.get('VIEW_COUNTER_FLUSH_INTERVAL', 10))
+app.config['VIEW_COUNTER_MAX_PENDING'] = int(os.environ.get('VIEW_COUNTER_MAX_PENDING', 500))
+
+
+def create_app():
+    """Return the app with routes and CLI commands registered by importing main.
 
-# Create tables
-with app.app_context():
-    import models
-    db.create_all()
-    logging.info("Database tables created")
\ No newline at end of file
+    Use it as `flask --app "app:create_app()"` or `gunicorn "app:create_app()"`;
+    plain `flask --app app` picks up the bare module-level app without the
+    commands, so use `FLASK_APP=main.py` there. Importing this module only
+    configures the app; nothing touches the database until a request or a CLI
+    command does, so workers start fast and are safe to preload.
+    """
+    import main  # noqa: F401  (registers models, routes and CLI commands)
+    return app
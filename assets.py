@@ -0,0 +1,117 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz variants are built without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+BUILD_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+COMPRESSIBLE = ('.css', '.js', '.svg', '.json', '.txt', '.html')
+# Preferred first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def build_assets(static_folder):
+    """Write content-hashed copies of static files plus .gz/.br variants and a manifest.
+
+    Returns the manifest: {'style.css': 'dist/style.<hash>.css', ...}
+    """
+    build_path = os.path.join(static_folder, BUILD_DIR)
+    os.makedirs(build_path, exist_ok=True)
+    manifest = {}
+    for root, dirs, files in os.walk(static_folder):
+        dirs[:] = [name for name in dirs if os.path.join(root, name) != build_path]
+        for name in sorted(files):
+            source = os.path.join(root, name)
+            logical = os.path.relpath(source, static_folder).replace(os.sep, '/')
+            with open(source, 'rb') as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()[:12]
+            stem, ext = os.path.splitext(logical)
+            hashed = f'{stem}.{digest}{ext}'
+            target = os.path.join(build_path, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(data)
+            if ext in COMPRESSIBLE:
+                with open(target + '.gz', 'wb') as f:
+                    f.write(gzip.compress(data, 9, mtime=0))
+                if brotli is not None:
+                    with open(target + '.br', 'wb') as f:
+                        f.write(brotli.compress(data, quality=11))
+            manifest[logical] = f'{BUILD_DIR}/{hashed}'
+    if brotli is None:
+        logger.warning("brotli is not installed; only .gz variants were built")
+    with open(os.path.join(build_path, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class AssetManifest:
+    """Maps static filenames to their fingerprinted builds.
+
+    Without a build (local development) every name maps to itself and the
+    regular static route is used unchanged.
+    """
+
+    def __init__(self):
+        self.app = None
+        self.files = {}
+        self.hashed = set()
+
+    def init_app(self, app):
+        self.app = app
+        self.load()
+        app.url_defaults(self.hashed_static_url)
+        app.view_functions['static'] = self.serve
+
+    def load(self):
+        path = os.path.join(self.app.static_folder, BUILD_DIR, MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                self.files = json.load(f)
+        except FileNotFoundError:
+            self.files = {}
+        except ValueError as e:
+            logger.error(f"Ignoring unreadable asset manifest {path}: {str(e)}")
+            self.files = {}
+        self.hashed = set(self.files.values())
+
+    def hashed_static_url(self, endpoint, values):
+        if endpoint == 'static' and values.get('filename') in self.files:
+            values['filename'] = self.files[values['filename']]
+
+    def serve(self, filename):
+        if filename not in self.hashed:
+            return self.app.send_static_file(filename)
+
+        # The name changes with the content, so the file can be cached forever
+        accepted = request.accept_encodings
+        for encoding, suffix in ENCODINGS:
+            if accepted[encoding] and os.path.exists(os.path.join(self.app.static_folder, filename + suffix)):
+                response = send_from_directory(
+                    self.app.static_folder, filename + suffix,
+                    mimetype=mimetypes.guess_type(filename)[0], max_age=self.app.config['ASSET_MAX_AGE']
+                )
+                response.headers['Content-Encoding'] = encoding
+                break
+        else:
+            response = send_from_directory(
+                self.app.static_folder, filename, max_age=self.app.config['ASSET_MAX_AGE']
+            )
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+asset_manifest = AssetManifest()
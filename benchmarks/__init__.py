@@ -0,0 +1,6 @@
+"""Benchmarks and load tests for NewsFlash247.
+
+Run with ``python -m benchmarks --help``. The suite seeds a throwaway
+database with synthetic data, drives the main pages and a newsletter run
+against an in-process SMTP sink, and writes the results as JSON.
+"""
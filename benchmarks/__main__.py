@@ -0,0 +1,136 @@
+"""python -m benchmarks [options]
+
+Example, a large run saved for later comparison:
+
+    python -m benchmarks --articles 100000 --subscribers 1000000 \
+        --email-logs 5000000 --output results/baseline.json
+    python -m benchmarks --skip-seed --compare results/baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+ENDPOINTS = {
+    'home': '/',
+    'admin_panel': '/admin',
+    'admin_articles': '/admin/articles',
+    'admin_subscribers': '/admin/subscribers',
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='NewsFlash247 benchmarks')
+    parser.add_argument('--database', default='sqlite:///benchmark.db',
+                        help='Database URL to seed and benchmark (default: %(default)s)')
+    parser.add_argument('--articles', type=int, default=1000)
+    parser.add_argument('--subscribers', type=int, default=10000)
+    parser.add_argument('--email-logs', type=int, default=50000)
+    parser.add_argument('--skip-seed', action='store_true', help='Reuse the data already in the database')
+    parser.add_argument('--requests', type=int, default=50, help='Requests per endpoint')
+    parser.add_argument('--newsletter-recipients', type=int, default=2000,
+                        help='Subscribers the newsletter run sends to (0 to skip)')
+    parser.add_argument('--smtp-delay-ms', type=float, default=0, help='Per-message latency of the SMTP sink')
+    parser.add_argument('--output', default=None, help='JSON results file (default: benchmark-<timestamp>.json)')
+    parser.add_argument('--compare', default=None, help='Baseline results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Relative change counted as a regression (default: %(default)s)')
+    return parser.parse_args(argv)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # The app reads its configuration at import time
+    os.environ['DATABASE_URL'] = args.database
+    os.environ['JOBS_IN_PROCESS'] = '0'
+    os.environ.setdefault('MAIL_USERNAME', 'benchmark@bench.example')
+    os.environ.setdefault('MAIL_PASSWORD', 'benchmark')
+
+    from app import create_app, db
+    from models import NewsArticle
+    from seed import init_db, seed_database
+    from benchmarks.datagen import generate
+    from benchmarks.smtp_sink import SMTPSink
+    from benchmarks.runner import measure_endpoint, run_newsletter, compare, save_results
+
+    app = create_app()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    sink = SMTPSink(delay=args.smtp_delay_ms / 1000).start()
+    app.config.update(MAIL_SERVER='127.0.0.1', MAIL_PORT=sink.port, MAIL_USE_TLS=False)
+
+    results = {
+        'meta': {
+            'started_at': datetime.utcnow().isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'requests_per_endpoint': args.requests,
+        },
+        'endpoints': {}
+    }
+
+    with app.app_context():
+        engine = db.engine
+        results['meta']['database'] = engine.url.render_as_string(hide_password=True)
+        init_db()
+        seed_database()
+        if not args.skip_seed:
+            results['seed'] = generate(args.articles, args.subscribers, args.email_logs)
+        results['meta']['rows'] = {
+            table: db.session.execute(db.text(f'SELECT COUNT(*) FROM {table}')).scalar()
+            for table in ('news_articles', 'news_subscribers', 'email_logs')
+        }
+
+    client = app.test_client()
+    client.post('/login', data={'email': 'admin@newsflash247.com', 'password': 'admin123'})
+    for name, path in ENDPOINTS.items():
+        result = measure_endpoint(client, engine, path, args.requests)
+        results['endpoints'][name] = result
+        if result['failed']:
+            print(f"{name:<20} FAILED: all {result['requests']} requests errored")
+            continue
+        print(f"{name:<20} p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+              f"p99 {result['p99_ms']:>8} ms  {result['mean_queries']:>6} queries  "
+              f"first {result['first_ms']} ms  errors {result['errors']}")
+
+    if args.newsletter_recipients:
+        with app.app_context():
+            articles = NewsArticle.listing().filter_by(is_published=True).order_by(
+                NewsArticle.created_at.desc()
+            ).limit(5).all()
+            results['newsletter'] = run_newsletter(articles, sink, args.newsletter_recipients)
+        newsletter = results['newsletter']
+        print(f"{'send_newsletter':<20} {newsletter['recipients']} recipients in {newsletter['seconds']}s  "
+              f"{newsletter['msgs_per_sec']} msgs/sec  {newsletter['smtp_logins']} SMTP logins  "
+              f"{newsletter['queries']} queries")
+    sink.stop()
+
+    output = args.output or f"benchmark-{datetime.utcnow():%Y%m%d-%H%M%S}.json"
+    save_results(results, output)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        lines, regressed = compare(results, baseline, args.threshold)
+        print('\n'.join(lines))
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
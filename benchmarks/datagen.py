@@ -0,0 +1,121 @@
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import insert, func
+from app import db
+from models import User, NewsArticle, NewsSubscriber, EmailLog
+
+CATEGORIES = ['Technology', 'Politics', 'Business', 'Sports', 'Health', 'Science', 'Education', 'Environment']
+WORDS = (
+    'market economy climate policy government election research study report growth energy '
+    'health school students teachers science technology data network security company '
+    'investment trade global local city council community sports team season league match '
+    'player coach record weather storm rainfall drought water project funding budget plan '
+    'innovation startup software hardware device launch announce official minister court '
+    'ruling law public private sector industry workers jobs wages inflation prices rates '
+    'bank central hospital patients doctors vaccine treatment trial discovery space mission'
+).split()
+
+
+def _sentence(rng, words):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def _paragraphs(rng, word_count):
+    sentences = []
+    while word_count > 0:
+        length = min(word_count, rng.randint(8, 20))
+        sentences.append(_sentence(rng, length))
+        word_count -= length
+    return ' '.join(sentences)
+
+
+def _bulk_insert(table, rows):
+    if rows:
+        db.session.execute(insert(table), rows)
+        db.session.commit()
+
+
+def generate(articles=1000, subscribers=10000, email_logs=50000, batch_size=5000, seed=42, echo=print):
+    """Append synthetic articles, subscribers and email logs; returns row counts and timings.
+
+    Rows are written with Core bulk INSERTs, so the derived article columns
+    are computed here rather than by the ORM events.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    author_id = db.session.query(User.id).filter_by(is_admin=True).scalar()
+    if author_id is None:
+        raise RuntimeError('Seed an admin user first (flask seed)')
+    timings = {}
+
+    start = time.perf_counter()
+    rows = []
+    for _ in range(articles):
+        content = _paragraphs(rng, rng.randint(150, 600))
+        created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        published = rng.random() < 0.9
+        rows.append(dict(
+            NewsArticle.compute_text_stats(content),
+            title=_sentence(rng, rng.randint(5, 10))[:200],
+            content=content,
+            summary=_sentence(rng, rng.randint(12, 25))[:500],
+            category=rng.choice(CATEGORIES),
+            is_breaking=rng.random() < 0.05,
+            is_published=published,
+            views_count=rng.randint(0, 5000),
+            author_id=author_id,
+            created_at=created,
+            updated_at=created,
+            published_at=created if published else None
+        ))
+        if len(rows) >= batch_size:
+            _bulk_insert(NewsArticle.__table__, rows)
+            rows = []
+    _bulk_insert(NewsArticle.__table__, rows)
+    timings['articles_seconds'] = round(time.perf_counter() - start, 2)
+    echo(f"Inserted {articles} articles in {timings['articles_seconds']}s")
+
+    start = time.perf_counter()
+    # Continue numbering so repeated runs never collide on the unique email
+    offset = db.session.query(func.count(NewsSubscriber.id)).scalar()
+    rows = []
+    for index in range(offset, offset + subscribers):
+        rows.append(dict(
+            email=f'reader{index}@bench.example',
+            is_active=rng.random() < 0.85,
+            subscription_token=uuid.uuid4().hex,
+            subscribed_at=now - timedelta(minutes=rng.randint(0, 60 * 24 * 730)),
+            email_count=0
+        ))
+        if len(rows) >= batch_size:
+            _bulk_insert(NewsSubscriber.__table__, rows)
+            rows = []
+    _bulk_insert(NewsSubscriber.__table__, rows)
+    timings['subscribers_seconds'] = round(time.perf_counter() - start, 2)
+    echo(f"Inserted {subscribers} subscribers in {timings['subscribers_seconds']}s")
+
+    start = time.perf_counter()
+    rows = []
+    for _ in range(email_logs):
+        created = now - timedelta(minutes=rng.randint(0, 60 * 24 * 90))
+        status = 'sent' if rng.random() < 0.97 else 'failed'
+        rows.append(dict(
+            recipient_email=f'reader{rng.randint(0, max(1, offset + subscribers) - 1)}@bench.example',
+            subject='NewsFlash247 Daily Digest',
+            email_type=rng.choice(('newsletter', 'newsletter', 'newsletter', 'welcome')),
+            status=status,
+            error_message='Connection unexpectedly closed' if status == 'failed' else None,
+            sent_at=created if status == 'sent' else None,
+            created_at=created
+        ))
+        if len(rows) >= batch_size:
+            _bulk_insert(EmailLog.__table__, rows)
+            rows = []
+    _bulk_insert(EmailLog.__table__, rows)
+    timings['email_logs_seconds'] = round(time.perf_counter() - start, 2)
+    echo(f"Inserted {email_logs} email logs in {timings['email_logs_seconds']}s")
+
+    return timings
@@ -0,0 +1,151 @@
+import json
+import math
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+@contextmanager
+def count_queries(engine):
+    """Yields a one-item list holding the number of statements executed so far"""
+    counter = [0]
+
+    def on_execute(*args):
+        counter[0] += 1
+
+    event.listen(engine, 'before_cursor_execute', on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', on_execute)
+
+
+def measure_endpoint(client, engine, path, requests=50):
+    """Latency and query statistics for GET path; the first (cold) request is reported apart.
+
+    Only successful requests count towards the latency and query figures; an
+    endpoint where every request errored is reported as failed, without them.
+    """
+    latencies = []
+    queries = []
+    errors = 0
+    first_ms = None
+    for index in range(requests + 1):
+        with count_queries(engine) as counter:
+            start = time.perf_counter()
+            try:
+                response = client.get(path)
+                response.get_data()
+                failed = response.status_code >= 400
+            except Exception:
+                # The test client re-raises unhandled view errors
+                failed = True
+            elapsed = (time.perf_counter() - start) * 1000
+        errors += failed
+        if index == 0:
+            first_ms = elapsed
+            continue
+        if not failed:
+            latencies.append(elapsed)
+            queries.append(counter[0])
+    if not latencies:
+        return {'path': path, 'requests': requests, 'errors': errors, 'failed': True}
+    return {
+        'path': path,
+        'requests': requests,
+        'errors': errors,
+        'failed': False,
+        'first_ms': round(first_ms, 2),
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+        'p99_ms': round(percentile(latencies, 99), 2),
+        'mean_queries': round(sum(queries) / len(queries), 2),
+        'max_queries': max(queries)
+    }
+
+
+def run_newsletter(articles, sink, recipients):
+    """Send a newsletter to the last `recipients` active subscribers and measure throughput"""
+    from models import NewsSubscriber
+    from email_service import EmailService
+    from delivery import DeliveryProgress
+
+    # Ids have gaps and inactive rows, so count back over active subscribers
+    after_id = db.session.query(NewsSubscriber.id).filter_by(is_active=True).order_by(
+        NewsSubscriber.id.desc()
+    ).offset(recipients).limit(1).scalar() or 0
+    before = dict(sink.counts)
+    progress = DeliveryProgress('benchmark')
+    with count_queries(db.engine) as counter:
+        start = time.perf_counter()
+        sent_count, message = EmailService.send_newsletter(
+            articles, progress=progress, after_id=after_id
+        )
+        elapsed = time.perf_counter() - start
+    delivered = sink.counts['messages'] - before['messages']
+    return {
+        'recipients': progress.sent + progress.failed,
+        'sent': sent_count,
+        'failed': progress.failed,
+        'delivered_to_sink': delivered,
+        'smtp_logins': sink.counts['logins'] - before['logins'],
+        'seconds': round(elapsed, 2),
+        'msgs_per_sec': round((progress.sent + progress.failed) / elapsed, 1) if elapsed else None,
+        'queries': counter[0],
+        'message': message
+    }
+
+
+# Metrics where a higher value is a regression
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'mean_queries')
+
+
+def compare(current, baseline, threshold=0.2):
+    """Lines describing changes against a baseline run and whether any exceeds threshold"""
+    lines = []
+    regressed = False
+    for name, result in current['endpoints'].items():
+        old = baseline.get('endpoints', {}).get(name)
+        if not old:
+            continue
+        if result.get('errors', 0) > old.get('errors', 0):
+            regressed = True
+            lines.append(f"{name:<20} {'errors':<13} {old.get('errors', 0):>10} -> {result['errors']:<10}  REGRESSION")
+        if result.get('failed') or old.get('failed'):
+            # Timings of a run that never succeeded mean nothing
+            run = 'current' if result.get('failed') else 'baseline'
+            lines.append(f"{name:<20} not compared: every request failed in the {run} run")
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = old.get(metric), result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            flag = ''
+            if change > threshold:
+                flag = '  REGRESSION'
+                regressed = True
+            lines.append(f"{name:<20} {metric:<13} {before:>10} -> {after:<10} {change:+.0%}{flag}")
+    old_rate = baseline.get('newsletter', {}).get('msgs_per_sec')
+    new_rate = current.get('newsletter', {}).get('msgs_per_sec')
+    if old_rate and new_rate:
+        change = (new_rate - old_rate) / old_rate
+        flag = '  REGRESSION' if change < -threshold else ''
+        regressed = regressed or bool(flag)
+        lines.append(f"{'newsletter':<20} {'msgs_per_sec':<13} {old_rate:>10} -> {new_rate:<10} {change:+.0%}{flag}")
+    return lines, regressed
+
+
+def save_results(results, path):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
@@ -0,0 +1,141 @@
+import json
+import logging
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_, and_, update
+from app import db
+from models import NewsArticle, NewsletterCampaign
+from email_service import EmailService
+from delivery import DeliveryProgress
+from job_queue import Heartbeat, JobQueue, current_job_id, job_handler
+
+logger = logging.getLogger(__name__)
+
+RESUMABLE_STATUSES = ('pending', 'interrupted')
+
+
+class CampaignService:
+    @staticmethod
+    def create_campaign(article_limit=5):
+        """Snapshot the latest published articles into a new pending campaign"""
+        articles = NewsArticle.listing().filter_by(is_published=True).order_by(
+            NewsArticle.created_at.desc()
+        ).limit(article_limit).all()
+        if not articles:
+            return None
+        campaign = NewsletterCampaign(
+            subject=EmailService.newsletter_subject(),
+            article_ids=json.dumps([article.id for article in articles]),
+            status='pending'
+        )
+        db.session.add(campaign)
+        db.session.commit()
+        logger.info(f"Created newsletter campaign {campaign.id}")
+        return campaign
+
+    @staticmethod
+    def stale_cutoff():
+        return datetime.utcnow() - timedelta(seconds=current_app.config.get('CAMPAIGN_STALE_SECONDS', 600))
+
+    @staticmethod
+    def unfinished():
+        """The oldest campaign that still has recipients to deliver, if any"""
+        return NewsletterCampaign.query.filter(
+            NewsletterCampaign.status.in_(RESUMABLE_STATUSES + ('running',))
+        ).order_by(NewsletterCampaign.id).first()
+
+    @staticmethod
+    def claim(campaign_id):
+        """Mark a campaign as running unless another live process already owns it"""
+        now = datetime.utcnow()
+        claimed = NewsletterCampaign.query.filter(
+            NewsletterCampaign.id == campaign_id,
+            or_(
+                NewsletterCampaign.status.in_(RESUMABLE_STATUSES),
+                # A running campaign without a recent heartbeat belongs to a dead process
+                and_(NewsletterCampaign.status == 'running',
+                     NewsletterCampaign.heartbeat_at < CampaignService.stale_cutoff())
+            )
+        ).update({'status': 'running', 'heartbeat_at': now}, synchronize_session=False)
+        db.session.commit()
+        return db.session.get(NewsletterCampaign, campaign_id) if claimed else None
+
+    @staticmethod
+    def run(campaign_id):
+        """Deliver a campaign from its checkpoint; safe to call again after a crash.
+
+        The checkpoint is committed together with each chunk's email log, so a
+        restart resends at most the one chunk that was in flight.
+        """
+        campaign = CampaignService.claim(campaign_id)
+        if campaign is None:
+            return None, f"Campaign {campaign_id} is finished or running elsewhere"
+
+        if not campaign.started_at:
+            campaign.started_at = datetime.utcnow()
+            db.session.commit()
+
+        article_ids = campaign.article_id_list
+        articles = NewsArticle.listing().filter(NewsArticle.id.in_(article_ids)).all()
+        articles.sort(key=lambda article: article_ids.index(article.id))
+
+        base_sent, base_failed = campaign.sent_count, campaign.failed_count
+        progress = DeliveryProgress(f'campaign {campaign.id}')
+        job_id = current_job_id()
+
+        def checkpoint(progress, last_subscriber_id):
+            NewsletterCampaign.query.filter_by(id=campaign_id).update({
+                'last_subscriber_id': last_subscriber_id,
+                'sent_count': base_sent + progress.sent,
+                'failed_count': base_failed + progress.failed,
+                'heartbeat_at': datetime.utcnow()
+            }, synchronize_session=False)
+            # Run from the job queue: publish progress on the job row as well
+            if job_id:
+                JobQueue.update_progress(job_id, progress.to_dict())
+
+        def touch(connection):
+            connection.execute(
+                update(NewsletterCampaign)
+                .where(NewsletterCampaign.id == campaign_id, NewsletterCampaign.status == 'running')
+                .values(heartbeat_at=datetime.utcnow())
+            )
+
+        try:
+            # A slow, rate-limited chunk can outlast CAMPAIGN_STALE_SECONDS; the
+            # heartbeat keeps claim() from handing the campaign to a second runner
+            stale_seconds = current_app.config.get('CAMPAIGN_STALE_SECONDS', 600)
+            with Heartbeat(touch, stale_seconds / 3):
+                sent_count, message = EmailService.send_newsletter(
+                    articles,
+                    progress=progress,
+                    on_chunk=checkpoint,
+                    after_id=campaign.last_subscriber_id,
+                    subject=campaign.subject
+                )
+        except Exception as e:
+            db.session.rollback()
+            NewsletterCampaign.query.filter_by(id=campaign_id).update(
+                {'status': 'interrupted', 'last_error': str(e)}, synchronize_session=False
+            )
+            db.session.commit()
+            logger.error(f"Campaign {campaign_id} interrupted: {str(e)}")
+            raise
+
+        NewsletterCampaign.query.filter_by(id=campaign_id).update({
+            'status': 'completed',
+            'finished_at': datetime.utcnow(),
+            'last_error': None
+        }, synchronize_session=False)
+        db.session.commit()
+        logger.info(f"Campaign {campaign_id} completed: {message}")
+        return db.session.get(NewsletterCampaign, campaign_id), message
+
+
+@job_handler('newsletter_campaign')
+def run_campaign_job(payload):
+    campaign, message = CampaignService.run(payload['campaign_id'])
+    result = {'campaign_id': payload['campaign_id'], 'message': message}
+    if campaign is not None:
+        result.update(sent=campaign.sent_count, failed=campaign.failed_count)
+    return result
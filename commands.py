@@ -0,0 +1,128 @@
+import click
+from sqlalchemy import update, bindparam
+from app import app, db
+from models import NewsArticle
+from job_queue import JobWorkerPool
+from campaigns import CampaignService
+from search import SearchIndex
+from assets import build_assets, asset_manifest
+from profiler import request_profiler
+import migrations
+import seed
+
+
+@app.cli.command('email-worker')
+@click.option('--threads', default=None, type=int, help='Number of worker threads')
+@click.option('--poll-interval', default=None, type=float, help='Seconds between polls of an empty queue')
+def email_worker(threads, poll_interval):
+    """Run the background email job workers in the foreground"""
+    # Make sure every job handler is registered
+    import email_service  # noqa: F401
+    import campaigns  # noqa: F401
+    pool = JobWorkerPool(
+        app,
+        threads=threads or app.config['JOBS_WORKER_THREADS'],
+        poll_interval=poll_interval or app.config['JOBS_POLL_INTERVAL']
+    )
+    click.echo(f"Email worker running with {pool.threads} thread(s), press Ctrl+C to stop")
+    pool.run_forever()
+
+
+@app.cli.command('db-init')
+def db_init():
+    """Create missing tables and mark the migrations they include as applied"""
+    applied = seed.init_db()
+    click.echo(f"Database initialized (migrations recorded: {applied or 'none pending'})")
+
+
+@app.cli.command('seed')
+def seed_command():
+    """Create the admin user and sample articles if the database has no admin"""
+    if seed.seed_database():
+        click.echo("Created admin user and sample articles")
+    else:
+        click.echo("Admin user already exists, nothing to seed")
+
+
+@app.cli.command('db-upgrade')
+def db_upgrade():
+    """Apply pending schema migrations"""
+    applied = migrations.upgrade()
+    click.echo(f"Applied migrations: {applied}" if applied else "Database schema is up to date")
+
+
+@app.cli.command('backfill-article-stats')
+@click.option('--all', 'refresh_all', is_flag=True, help='Recompute every article, not only rows without stats')
+@click.option('--batch-size', default=500, help='Articles per UPDATE batch')
+def backfill_article_stats(refresh_all, batch_size):
+    """Compute stored word count, reading time and excerpt for existing articles"""
+    table = NewsArticle.__table__
+    statement = update(table).where(table.c.id == bindparam('_id')).values(
+        word_count=bindparam('word_count'),
+        reading_time=bindparam('reading_time'),
+        excerpt=bindparam('excerpt'),
+        # Keep updated_at as is, a backfill is not an edit
+        updated_at=table.c.updated_at
+    )
+    last_id = 0
+    total = 0
+    while True:
+        query = db.session.query(NewsArticle.id, NewsArticle.content).filter(NewsArticle.id > last_id)
+        if not refresh_all:
+            query = query.filter(NewsArticle.excerpt.is_(None))
+        rows = query.order_by(NewsArticle.id).limit(batch_size).all()
+        if not rows:
+            break
+        db.session.execute(statement, [
+            dict(_id=article_id, **NewsArticle.compute_text_stats(content))
+            for article_id, content in rows
+        ])
+        db.session.commit()
+        last_id = rows[-1][0]
+        total += len(rows)
+    click.echo(f"Updated text stats for {total} articles")
+
+
+@app.cli.command('send-digest')
+@click.option('--campaign-id', type=int, default=None, help='Resume this campaign instead of the oldest unfinished one')
+@click.option('--resume-only', is_flag=True, help='Only resume an unfinished campaign, never start a new one')
+@click.option('--articles', 'article_limit', default=5, help='Number of latest articles in a new digest')
+@click.option('--profile', is_flag=True, help='Run under cProfile and save the result for /admin/profiles')
+def send_digest(campaign_id, resume_only, article_limit, profile):
+    """Send the newsletter digest, resuming an interrupted campaign if there is one"""
+    if campaign_id is None:
+        campaign = CampaignService.unfinished()
+        if campaign is None:
+            if resume_only:
+                click.echo("No unfinished campaign to resume")
+                return
+            campaign = CampaignService.create_campaign(article_limit)
+            if campaign is None:
+                click.echo("No published articles to send")
+                return
+        campaign_id = campaign.id
+
+    click.echo(f"Running campaign {campaign_id}")
+    if profile:
+        with request_profiler.profile('send_digest', campaign_id=campaign_id):
+            campaign, message = CampaignService.run(campaign_id)
+    else:
+        campaign, message = CampaignService.run(campaign_id)
+    click.echo(message)
+
+
+@app.cli.command('search-rebuild')
+@click.option('--batch-size', default=500, help='Articles per INSERT batch')
+def search_rebuild(batch_size):
+    """Rebuild the full-text search index from all published articles"""
+    total = SearchIndex.rebuild(batch_size)
+    click.echo(f"Indexed {total} articles")
+
+
+@app.cli.command('assets-build')
+def assets_build():
+    """Write fingerprinted and precompressed static files and their manifest"""
+    manifest = build_assets(app.static_folder)
+    asset_manifest.load()
+    for name, hashed in manifest.items():
+        click.echo(f"{name} -> {hashed}")
@@ -0,0 +1,204 @@
+import hashlib
+import zlib
+from werkzeug.http import parse_accept_header
+from ttl_cache import TTLCache
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/javascript', 'application/xml',
+    'application/rss+xml', 'application/atom+xml', 'image/svg+xml'
+)
+
+
+def _weak_etag(headers):
+    """A strong ETag names exact bytes; once re-encoded, only weak equivalence holds"""
+    return [
+        (name, f'W/{value}' if name.lower() == 'etag' and not value.startswith('W/') else value)
+        for name, value in headers
+    ]
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data):
+        # Sync flush so every chunk of a streamed response reaches the client right away
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def chunk(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """WSGI middleware that gzip/brotli-encodes text responses.
+
+    Responses with a Content-Length are compressed in one go, skipped when
+    smaller than min_size, and - for anonymous requests to cacheable
+    responses - memoized by body hash so the same page is compressed once.
+    Streamed responses are compressed chunk by chunk without buffering.
+    Anything already encoded, ranged, HEAD or non-text passes through.
+    Re-encoded responses carry a weak ETag, since their bytes differ from
+    the identity representation the app tagged.
+    """
+
+    def __init__(self, wsgi_app, level=6, brotli_quality=4, min_size=500, cache_entries=128):
+        self.wsgi_app = wsgi_app
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+        self.cache = TTLCache(maxsize=cache_entries, ttl=3600) if cache_entries else None
+
+    @classmethod
+    def from_config(cls, wsgi_app, config):
+        return cls(
+            wsgi_app,
+            level=config.get('COMPRESSION_LEVEL', 6),
+            brotli_quality=config.get('COMPRESSION_BROTLI_QUALITY', 4),
+            min_size=config.get('COMPRESSION_MIN_SIZE', 500),
+            cache_entries=config.get('COMPRESSION_CACHE_ENTRIES', 128)
+        )
+
+    def choose_encoding(self, environ):
+        accepted = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def stream(self, encoding):
+        if encoding == 'br':
+            return _BrotliStream(self.brotli_quality)
+        return _GzipStream(self.level)
+
+    def compress(self, encoding, body):
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality)
+        stream = _GzipStream(self.level)
+        return stream.chunk(body) + stream.finish()
+
+    @staticmethod
+    def _should_compress(status, headers):
+        if int(status.split(' ', 1)[0]) in (204, 206, 304):
+            return False
+        header_map = {name.lower(): value for name, value in headers}
+        if 'content-encoding' in header_map or 'no-transform' in header_map.get('cache-control', ''):
+            return False
+        content_type = header_map.get('content-type', '')
+        return content_type.startswith(COMPRESSIBLE_TYPES)
+
+    @staticmethod
+    def _cacheable(environ, headers):
+        """Only bodies every anonymous visitor shares are worth keeping"""
+        if 'HTTP_COOKIE' in environ:
+            return False
+        header_map = {name.lower(): value for name, value in headers}
+        cache_control = header_map.get('cache-control', '')
+        return 'set-cookie' not in header_map and 'private' not in cache_control and 'no-store' not in cache_control
+
+    def __call__(self, environ, start_response):
+        encoding = self.choose_encoding(environ)
+        if encoding is None or environ.get('REQUEST_METHOD') == 'HEAD' or 'HTTP_RANGE' in environ:
+            return self.wsgi_app(environ, start_response)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured.update(status=status, headers=headers, exc_info=exc_info)
+            # Only the legacy write() path sees this; Flask returns an iterable instead
+            return lambda data: None
+
+        app_iter = self.wsgi_app(environ, capture)
+        chunks = iter(app_iter)
+        # A generator app may only call start_response when its first chunk is produced
+        first = next(chunks, b'') if 'status' not in captured else None
+
+        status, headers = captured['status'], list(captured['headers'])
+        if not self._should_compress(status, headers):
+            if status.startswith('304'):
+                # A 304 has no Content-Type to go by; a weak tag still matches
+                # whichever copy the client revalidates
+                headers = _weak_etag(headers)
+            start_response(status, headers, captured['exc_info'])
+            return app_iter if first is None else _Prepended(first, chunks, app_iter)
+
+        length = next((value for name, value in headers if name.lower() == 'content-length'), None)
+        headers = [(name, value) for name, value in headers if name.lower() != 'content-length']
+        vary = [value for name, value in headers if name.lower() == 'vary']
+        headers = [(name, value) for name, value in headers if name.lower() != 'vary']
+        headers.append(('Vary', ', '.join(vary + ['Accept-Encoding'])))
+
+        if length is None:
+            headers = _weak_etag(headers)
+            headers.append(('Content-Encoding', encoding))
+            start_response(status, headers, captured['exc_info'])
+            return self._compress_stream(encoding, first, chunks, app_iter)
+
+        # The full body is already in memory: compress it at once
+        try:
+            body = (first or b'') + b''.join(chunks)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        if len(body) < self.min_size:
+            headers.append(('Content-Length', str(len(body))))
+            start_response(status, headers, captured['exc_info'])
+            return [body]
+
+        if self.cache is not None and self._cacheable(environ, headers):
+            key = (encoding, hashlib.sha1(body).hexdigest())
+            compressed = self.cache.get_or_set(key, lambda: self.compress(encoding, body))
+        else:
+            compressed = self.compress(encoding, body)
+        headers = _weak_etag(headers)
+        headers.append(('Content-Encoding', encoding))
+        headers.append(('Content-Length', str(len(compressed))))
+        start_response(status, headers, captured['exc_info'])
+        return [compressed]
+
+    def _compress_stream(self, encoding, first, chunks, app_iter):
+        stream = self.stream(encoding)
+        try:
+            if first:
+                yield stream.chunk(first)
+            for data in chunks:
+                if data:
+                    yield stream.chunk(data)
+            yield stream.finish()
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+
+class _Prepended:
+    """An app_iter with an already-consumed first chunk put back in front"""
+
+    def __init__(self, first, chunks, app_iter):
+        self.first = first
+        self.chunks = chunks
+        self.app_iter = app_iter
+
+    def __iter__(self):
+        if self.first:
+            yield self.first
+        yield from self.chunks
+
+    def close(self):
+        if hasattr(self.app_iter, 'close'):
+            self.app_iter.close()
@@ -0,0 +1,40 @@
+import hashlib
+from datetime import timezone
+from flask import request, current_app
+
+
+def make_etag(*parts):
+    """Strong validator built from whatever identifies the current state of a resource"""
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:20]
+
+
+def _http_date(value):
+    # HTTP dates have one-second resolution and are always UTC
+    return value.replace(microsecond=0, tzinfo=timezone.utc) if value else None
+
+
+def is_not_modified(etag, last_modified=None):
+    """True when the client's cached copy matches etag / last_modified"""
+    if request.if_none_match:
+        # Weak comparison (RFC 9110): compressed copies carry W/ tags
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return _http_date(last_modified) <= request.if_modified_since
+    return False
+
+
+def conditional_response(etag, last_modified, build, cache_control='public, no-cache'):
+    """Answer 304 when the client is current, otherwise call build() for the response.
+
+    The validator must be computed without loading the resource itself, so an
+    unchanged poll costs one cheap query and no serialization.
+    """
+    if is_not_modified(etag, last_modified):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.make_response(build())
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = _http_date(last_modified)
+    response.headers['Cache-Control'] = cache_control
+    return response
@@ -0,0 +1,143 @@
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND_PREFIX = 'replica'
+STICKY_SESSION_KEY = '_db_primary_until'
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries for a comma-separated list of replica URLs"""
+    return {
+        f'{REPLICA_BIND_PREFIX}_{index}': url.strip()
+        for index, url in enumerate(urls.split(',')) if url.strip()
+    }
+
+
+def replica_reads(view):
+    """Let SELECTs in this view go to a read replica"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.replica_reads = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside this block, even in a @replica_reads view.
+
+    Use it around anything whose result is cached past the request, so a
+    lagging replica can't put stale data back into a cache that was just
+    invalidated.
+    """
+    if not has_request_context():
+        yield
+        return
+    previous = g.get('replica_reads')
+    g.replica_reads = False
+    try:
+        yield
+    finally:
+        g.replica_reads = previous
+
+
+class ReplicaRouter:
+    """Picks a healthy replica engine, round robin.
+
+    Each replica is pinged at most once per health_interval seconds; one that
+    fails is skipped until its next check, so reads fall back to the primary.
+    """
+
+    def __init__(self):
+        self.names = []
+        self.health_interval = 5
+        self.sticky_seconds = 0
+        self._health = {}  # bind name -> (healthy, checked_at)
+        self._lock = threading.Lock()
+        self._cycle = None
+
+    def init_app(self, app, db):
+        self.db = db
+        self.names = sorted(
+            name for name in app.config.get('SQLALCHEMY_BINDS', {})
+            if name.startswith(REPLICA_BIND_PREFIX)
+        )
+        self.health_interval = app.config.get('REPLICA_HEALTH_INTERVAL', 5)
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+        self._cycle = itertools.cycle(self.names) if self.names else None
+        app.after_request(self._remember_write)
+
+    def healthy(self, name):
+        now = time.monotonic()
+        healthy, checked_at = self._health.get(name, (True, None))
+        if checked_at is not None and now - checked_at < self.health_interval:
+            return healthy
+        try:
+            with self.db.engines[name].connect() as connection:
+                connection.execute(text('SELECT 1'))
+            healthy = True
+        except Exception as e:
+            if healthy:
+                logger.warning(f"Read replica {name} is unavailable, using the primary: {str(e)}")
+            healthy = False
+        self._health[name] = (healthy, now)
+        return healthy
+
+    def pick(self):
+        if not self._cycle:
+            return None
+        with self._lock:
+            candidates = [next(self._cycle) for _ in self.names]
+        for name in candidates:
+            if self.healthy(name):
+                return self.db.engines[name]
+        return None
+
+    def reads_allowed(self):
+        """Replica reads are opt-in per view and paused right after this client wrote"""
+        if not self.names or not has_request_context() or not g.get('replica_reads'):
+            return False
+        return session.get(STICKY_SESSION_KEY, 0) < time.time()
+
+    def _remember_write(self, response):
+        # Keep the follow-up request (usually a redirect) on the primary while replicas catch up
+        if g.get('db_wrote') and self.names and self.sticky_seconds:
+            session[STICKY_SESSION_KEY] = time.time() + self.sticky_seconds
+        return response
+
+
+replica_router = ReplicaRouter()
+
+
+def _is_plain_select(clause):
+    return getattr(clause, 'is_select', False) and getattr(clause, '_for_update_arg', None) is None
+
+
+class RoutingSession(Session):
+    """db.session that may send reads to a replica.
+
+    Flushes, DML and raw SQL always use the primary. Once this session has
+    written, later reads in the same request stay on the primary too, so a
+    request always sees its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or getattr(clause, 'is_dml', False):
+                self.info['wrote'] = True
+                if has_request_context():
+                    g.db_wrote = True
+            elif _is_plain_select(clause) and not self.info.get('wrote') and replica_router.reads_allowed():
+                engine = replica_router.pick()
+                if engine is not None:
+                    return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
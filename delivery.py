@@ -0,0 +1,236 @@
+import queue
+import threading
+import time
+import logging
+from smtp_pool import SMTPConnection
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class TokenBucket:
+    """Blocking messages-per-second limiter shared by every worker sending to one host"""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class DeliveryProgress:
+    """Thread-safe live counters for a newsletter run"""
+
+    def __init__(self, name='newsletter'):
+        self.name = name
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self.started_at = time.time()
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def add_queued(self, count=1):
+        with self._lock:
+            self.queued += count
+
+    def record(self, success, was_queued=True):
+        with self._lock:
+            if was_queued:
+                self.queued -= 1
+            if success:
+                self.sent += 1
+            else:
+                self.failed += 1
+
+    def drop(self, count=1):
+        """Forget messages that were queued but will never be sent"""
+        with self._lock:
+            self.queued -= count
+
+    def finish(self):
+        self.finished_at = time.time()
+
+    @property
+    def msgs_per_sec(self):
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return (self.sent + self.failed) / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'name': self.name,
+                'sent': self.sent,
+                'failed': self.failed,
+                'queued': self.queued,
+                'msgs_per_sec': round(self.msgs_per_sec, 2),
+                'running': self.finished_at is None,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at
+            }
+
+
+# Runs in this process, so an admin request can read live counters
+_active_progress = {}
+_active_lock = threading.Lock()
+
+
+def active_progress():
+    with _active_lock:
+        return [progress.to_dict() for progress in _active_progress.values()]
+
+
+class DeliveryEngine:
+    """Sends prepared messages from a bounded pool of threads.
+
+    Each worker thread owns one SMTPConnection for the whole run, and all of
+    them draw from a shared TokenBucket so the provider's rate limit holds
+    regardless of concurrency. Workers never touch the database; outcomes
+    are handed back to the caller's thread through wait_for_results().
+    """
+
+    def __init__(self, connection_factory, concurrency=4, rate_limit=0, progress=None, result_timeout=300):
+        self.connection_factory = connection_factory
+        self.concurrency = max(1, concurrency)
+        self.result_timeout = result_timeout
+        self.bucket = TokenBucket(rate_limit) if rate_limit else None
+        self.progress = progress or DeliveryProgress()
+        self._tasks = queue.Queue(maxsize=self.concurrency * 50)
+        self._results = queue.Queue()
+        self._threads = []
+        self._connections = []
+
+    @classmethod
+    def from_config(cls, config, progress=None):
+        def connection_factory():
+            return SMTPConnection(
+                config['MAIL_SERVER'],
+                config['MAIL_PORT'],
+                config.get('MAIL_USERNAME'),
+                config.get('MAIL_PASSWORD'),
+                use_tls=config.get('MAIL_USE_TLS', True),
+                max_messages=config.get('MAIL_MAX_MESSAGES_PER_CONNECTION', 100),
+                timeout=config.get('MAIL_TIMEOUT', 30)
+            )
+        return cls(
+            connection_factory,
+            concurrency=config.get('NEWSLETTER_CONCURRENCY', 4),
+            rate_limit=config.get('NEWSLETTER_RATE_LIMIT', 0),
+            progress=progress,
+            result_timeout=config.get('NEWSLETTER_RESULT_TIMEOUT', 300)
+        )
+
+    def start(self):
+        with _active_lock:
+            _active_progress[id(self)] = self.progress
+        for index in range(self.concurrency):
+            connection = self.connection_factory()
+            self._connections.append(connection)
+            thread = threading.Thread(
+                target=self._work, args=(connection,), name=f'newsletter-sender-{index}', daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, key, msg):
+        """Queue a message; key comes back with its outcome"""
+        self.progress.add_queued()
+        while True:
+            try:
+                self._tasks.put((key, msg), timeout=1)
+                return
+            except queue.Full:
+                self._check_senders()
+
+    def wait_for_results(self, count):
+        """Block until count outcomes are available and return [(key, error), ...].
+
+        Raises RuntimeError when a sender thread has died or no outcome arrived
+        for result_timeout seconds, so the job fails and can be retried.
+        """
+        results = []
+        last_result = time.monotonic()
+        while len(results) < count:
+            try:
+                results.append(self._results.get(timeout=1))
+                last_result = time.monotonic()
+            except queue.Empty:
+                self._check_senders()
+                if self.result_timeout and time.monotonic() - last_result > self.result_timeout:
+                    raise RuntimeError(
+                        f"No delivery outcome for {self.result_timeout}s, "
+                        f"{count - len(results)} messages outstanding"
+                    )
+        return results
+
+    def _check_senders(self):
+        dead = [thread.name for thread in self._threads if not thread.is_alive()]
+        if dead:
+            raise RuntimeError(f"Newsletter sender thread died: {', '.join(dead)}")
+
+    def close(self):
+        # Unsent messages are dropped; the caller's checkpoint decides what is retried
+        dropped = 0
+        while True:
+            try:
+                self._tasks.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                break
+        self.progress.drop(dropped)
+        for _ in self._threads:
+            self._tasks.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self.progress.finish()
+        with _active_lock:
+            _active_progress.pop(id(self), None)
+        for index, connection in enumerate(self._connections):
+            stats = connection.stats()
+            if connection.connects:
+                logger.info(
+                    f"Sender {index}: {stats['messages_sent']} sent, {stats['failures']} failed, "
+                    f"{stats['connects']} logins, {stats['msgs_per_sec']} msgs/sec"
+                )
+
+    def _work(self, connection):
+        try:
+            while True:
+                task = self._tasks.get()
+                if task is _STOP:
+                    return
+                key, msg = task
+                if self.bucket:
+                    self.bucket.acquire()
+                try:
+                    connection.send(msg)
+                    error = None
+                except Exception as e:
+                    error = str(e) or e.__class__.__name__
+                self.progress.record(error is None)
+                self._results.put((key, error))
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
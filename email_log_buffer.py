@@ -0,0 +1,140 @@
+import atexit
+import threading
+import weakref
+import logging
+from datetime import datetime
+from sqlalchemy import insert, update
+from app import app, db
+from models import EmailLog
+
+logger = logging.getLogger(__name__)
+
+# Buffers that still hold unwritten outcomes, flushed on interpreter shutdown
+_live_buffers = weakref.WeakSet()
+
+
+class EmailLogBuffer:
+    """Bulk EmailLog writer for campaign sends.
+
+    Recipients of a chunk are inserted as 'pending' in one statement before
+    any mail goes out, and their outcomes are applied afterwards with one
+    bulk UPDATE. A crash mid-chunk therefore leaves 'pending' rows rather
+    than missing ones.
+    """
+
+    def __init__(self, subject, email_type, chunk_size=500):
+        self.subject = subject
+        self.email_type = email_type
+        self.chunk_size = max(1, chunk_size)
+        self._log_ids = {}     # recipient email -> reserved EmailLog id
+        self._outcomes = []    # rows for the bulk UPDATE
+        self._unreserved = []  # rows for recipients that were never reserved
+        self._lock = threading.Lock()
+        _live_buffers.add(self)
+
+    def reserve(self, recipients):
+        """Insert 'pending' log rows for a batch of recipients and commit them.
+
+        The rows must be durable before any of these messages goes out, so a
+        crash mid-chunk leaves 'pending' rows behind. Call it between chunks,
+        when the caller has nothing else uncommitted.
+        """
+        now = datetime.utcnow()
+        rows = [
+            {
+                'recipient_email': email,
+                'subject': self.subject,
+                'email_type': self.email_type,
+                'status': 'pending',
+                'created_at': now
+            }
+            for email in recipients if email not in self._log_ids
+        ]
+        for start in range(0, len(rows), self.chunk_size):
+            result = db.session.execute(
+                insert(EmailLog).returning(EmailLog.id, EmailLog.recipient_email),
+                rows[start:start + self.chunk_size]
+            )
+            for log_id, email in result:
+                self._log_ids[email] = log_id
+        db.session.commit()
+
+    def mark(self, recipient_email, status, error_message=None):
+        """Record the outcome of one send; written on the next flush"""
+        sent_at = datetime.utcnow() if status == 'sent' else None
+        with self._lock:
+            log_id = self._log_ids.pop(recipient_email, None)
+            if log_id is None:
+                self._unreserved.append({
+                    'recipient_email': recipient_email,
+                    'subject': self.subject,
+                    'email_type': self.email_type,
+                    'status': status,
+                    'error_message': error_message,
+                    'sent_at': sent_at,
+                    'created_at': datetime.utcnow()
+                })
+            else:
+                self._outcomes.append({
+                    'id': log_id,
+                    'status': status,
+                    'error_message': error_message,
+                    'sent_at': sent_at
+                })
+
+    def flush(self):
+        """Write buffered outcomes with bulk statements and commit.
+
+        It always commits, so any other pending changes of the caller
+        (subscriber stats, checkpoints) land in the same transaction as the
+        log rows. The only other commit is reserve()'s, before a chunk is sent.
+        """
+        with self._lock:
+            outcomes, self._outcomes = self._outcomes, []
+            unreserved, self._unreserved = self._unreserved, []
+        try:
+            for start in range(0, len(outcomes), self.chunk_size):
+                db.session.execute(update(EmailLog), outcomes[start:start + self.chunk_size])
+            for start in range(0, len(unreserved), self.chunk_size):
+                db.session.execute(insert(EmailLog), unreserved[start:start + self.chunk_size])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            # Keep the rows so a later flush can try again
+            with self._lock:
+                self._outcomes = outcomes + self._outcomes
+                self._unreserved = unreserved + self._unreserved
+            logger.error(f"Failed to flush {len(outcomes) + len(unreserved)} email log rows: {str(e)}")
+            raise
+
+    def close(self):
+        self.flush()
+        _live_buffers.discard(self)
+
+    def discard(self):
+        """Drop unwritten outcomes; their reserved rows stay 'pending'"""
+        with self._lock:
+            self._outcomes = []
+            self._unreserved = []
+        _live_buffers.discard(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # A failed send must not commit its half-finished transaction
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+@atexit.register
+def _flush_live_buffers():
+    """Write outstanding outcomes when a worker shuts down"""
+    for buffer in list(_live_buffers):
+        try:
+            with app.app_context():
+                buffer.flush()
+        except Exception as e:
+            logger.error(f"Email log buffer lost on shutdown: {str(e)}")
@@ -1,10 +1,15 @@
-import smtplib
 import secrets
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from flask import current_app, render_template_string
-from models import EmailLog, NewsSubscriber
+from flask import current_app
+from models import EmailLog, NewsSubscriber, NewsArticle
 from app import db
+from smtp_pool import SMTPConnection
+from delivery import DeliveryEngine, DeliveryProgress
+from email_log_buffer import EmailLogBuffer
+from newsletter_renderer import NewsletterRenderer
+from job_queue import JobQueue, job_handler, current_job_id
+from stats_service import StatsService
 from datetime import datetime
 import logging
 
@@ -15,6 +20,7 @@ class EmailService:
     @staticmethod
     def send_email(to_email, subject, html_content, email_type='general'):
         """Send email using SMTP"""
+        email_log = None
         try:
             # Create email log entry
             email_log = EmailLog(
@@ -28,49 +34,65 @@ class EmailService:
             
             # Check if email credentials are configured
             if not current_app.config.get('MAIL_USERNAME') or not current_app.config.get('MAIL_PASSWORD'):
-                email_log.status = 'failed'
-                email_log.error_message = 'Email credentials not configured'
-                db.session.commit()
+                EmailService._record_outcome(email_log, 'failed', 'Email credentials not configured')
                 logger.warning(f"Email credentials not configured for {to_email}")
                 return False
             
             # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = current_app.config['MAIL_DEFAULT_SENDER']
-            msg['To'] = to_email
-            
-            # Add HTML content
-            html_part = MIMEText(html_content, 'html')
-            msg.attach(html_part)
+            msg = EmailService.build_message(
+                to_email, subject, html_content, current_app.config['MAIL_DEFAULT_SENDER']
+            )
             
             # Send email
-            with smtplib.SMTP(current_app.config['MAIL_SERVER'], current_app.config['MAIL_PORT']) as server:
-                server.starttls()
-                server.login(
-                    current_app.config['MAIL_USERNAME'],
-                    current_app.config['MAIL_PASSWORD']
-                )
-                server.send_message(msg)
+            connection = SMTPConnection(
+                current_app.config['MAIL_SERVER'],
+                current_app.config['MAIL_PORT'],
+                current_app.config['MAIL_USERNAME'],
+                current_app.config['MAIL_PASSWORD'],
+                use_tls=current_app.config.get('MAIL_USE_TLS', True),
+                timeout=current_app.config.get('MAIL_TIMEOUT', 30)
+            )
+            try:
+                connection.send(msg)
+            finally:
+                connection.close()
             
             # Update log as sent
-            email_log.status = 'sent'
-            email_log.sent_at = datetime.utcnow()
-            db.session.commit()
+            EmailService._record_outcome(email_log, 'sent')
             
             logger.info(f"Email sent successfully to {to_email}")
             return True
             
         except Exception as e:
             # Update log as failed
-            if 'email_log' in locals():
-                email_log.status = 'failed'
-                email_log.error_message = str(e)
-                db.session.commit()
+            if email_log is not None:
+                EmailService._record_outcome(email_log, 'failed', str(e))
             
             logger.error(f"Failed to send email to {to_email}: {str(e)}")
             return False
     
+    @staticmethod
+    def build_message(to_email, subject, html_content, sender):
+        """Create an HTML email message"""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = sender
+        msg['To'] = to_email
+        
+        # Add HTML content
+        html_part = MIMEText(html_content, 'html')
+        msg.attach(html_part)
+        return msg
+    
+    @staticmethod
+    def _record_outcome(email_log, status, error_message=None):
+        """Store a send outcome on the log row"""
+        email_log.status = status
+        email_log.error_message = error_message
+        if status == 'sent':
+            email_log.sent_at = datetime.utcnow()
+        db.session.commit()
+    
     @staticmethod
     def send_welcome_email(email):
         """Send welcome email to new subscriber"""
@@ -141,7 +163,8 @@ class EmailService:
                     existing.is_active = True
                     existing.subscribed_at = datetime.utcnow()
                     db.session.commit()
-                    EmailService.send_welcome_email(email)
+                    StatsService.invalidate()
+                    EmailService.queue_welcome_email(email)
                     return True, "Subscription reactivated"
             
             # Create new subscription
@@ -152,9 +175,10 @@ class EmailService:
             )
             db.session.add(subscriber)
             db.session.commit()
+            StatsService.invalidate()
             
-            # Send welcome email
-            EmailService.send_welcome_email(email)
+            # Send welcome email from the background worker
+            EmailService.queue_welcome_email(email)
             
             return True, "Successfully subscribed"
             
@@ -164,110 +188,170 @@ class EmailService:
             return False, "Failed to subscribe"
     
     @staticmethod
-    def send_newsletter(articles, test_email=None):
-        """Send newsletter to all active subscribers"""
+    def queue_welcome_email(email):
+        """Queue the welcome email instead of sending it on the request thread"""
+        return JobQueue.enqueue('welcome_email', {'email': email})
+    
+    @staticmethod
+    def queue_newsletter(articles, test_email=None):
+        """Queue a newsletter run for the background worker"""
+        # A newsletter is not retried automatically, a second run would double-send
+        return JobQueue.enqueue(
+            'newsletter',
+            {'article_ids': [article.id for article in articles], 'test_email': test_email},
+            max_attempts=1
+        )
+    
+    @staticmethod
+    def unsubscribe_email(token):
+        """Deactivate the subscription that owns a token"""
+        subscriber = NewsSubscriber.query.filter_by(subscription_token=token).first()
+        if not subscriber:
+            return False, "Invalid unsubscribe link"
+        if not subscriber.is_active:
+            return True, "You are already unsubscribed"
+        subscriber.is_active = False
+        db.session.commit()
+        StatsService.invalidate()
+        return True, "You have been unsubscribed from the newsletter"
+    
+    @staticmethod
+    def send_newsletter(articles, test_email=None, progress=None, on_chunk=None, after_id=0, subject=None):
+        """Send newsletter to all active subscribers with an id above after_id.
+        
+        Messages go out through a DeliveryEngine (NEWSLETTER_CONCURRENCY
+        sender threads, NEWSLETTER_RATE_LIMIT msgs/sec). on_chunk(progress,
+        last_subscriber_id) is called after each chunk, before its database
+        writes are committed, so checkpoints land in the same transaction.
+        """
         if not articles:
             return 0, "No articles to send"
         
-        # Get recipients
-        if test_email:
-            recipients = [test_email]
-        else:
-            subscribers = NewsSubscriber.query.filter_by(is_active=True).all()
-            recipients = [sub.email for sub in subscribers]
+        # Create newsletter content; the shared part is rendered once per run
+        subject = subject or EmailService.newsletter_subject()
         
-        if not recipients:
-            return 0, "No active subscribers"
+        renderer = NewsletterRenderer(articles)
         
-        # Create newsletter content
-        subject = f"NewsFlash247 Daily Digest - {datetime.now().strftime('%B %d, %Y')}"
+        # Recipients are streamed in id-ordered chunks so memory stays flat
+        config = current_app.config
+        chunk_size = config.get('EMAIL_LOG_CHUNK_SIZE', 500)
+        if test_email:
+            batches = iter([[(None, test_email, None)]])
+        else:
+            batches = EmailService.iter_recipient_batches(chunk_size, after_id)
         
-        html_content = EmailService.create_newsletter_html(articles)
+        credentials_configured = config.get('MAIL_USERNAME') and config.get('MAIL_PASSWORD')
+        progress = progress or DeliveryProgress()
         
-        # Send emails
+        # Send emails in parallel, then write the email log and subscriber
+        # stats in bulk, one chunk at a time
         sent_count = 0
-        for email in recipients:
-            if EmailService.send_email(email, subject, html_content, 'newsletter'):
-                sent_count += 1
+        recipient_count = 0
+        with DeliveryEngine.from_config(config, progress) as engine, \
+                EmailLogBuffer(subject, 'newsletter', chunk_size) as log_buffer:
+            for chunk in batches:
+                recipient_count += len(chunk)
+                log_buffer.reserve([email for _, email, _ in chunk])
+                
+                if not credentials_configured:
+                    for _, email, _ in chunk:
+                        log_buffer.mark(email, 'failed', 'Email credentials not configured')
+                    logger.warning(f"Email credentials not configured, {len(chunk)} newsletters not sent")
+                    for _ in chunk:
+                        progress.record(False, was_queued=False)
+                    if on_chunk:
+                        on_chunk(progress, chunk[-1][0])
+                    log_buffer.flush()
+                    continue
+                
+                for subscriber_id, email, token in chunk:
+                    html_content = renderer.render(
+                        EmailService.unsubscribe_url(token) if token else '#'
+                    )
+                    msg = EmailService.build_message(email, subject, html_content, config['MAIL_DEFAULT_SENDER'])
+                    engine.submit((subscriber_id, email), msg)
+                
+                sent_ids = []
+                for (subscriber_id, email), error in engine.wait_for_results(len(chunk)):
+                    if error is None:
+                        sent_count += 1
+                        log_buffer.mark(email, 'sent')
+                        if subscriber_id is not None:
+                            sent_ids.append(subscriber_id)
+                    else:
+                        log_buffer.mark(email, 'failed', error)
+                        logger.error(f"Failed to send email to {email}: {error}")
                 
-                # Update subscriber stats
-                if not test_email:
-                    subscriber = NewsSubscriber.query.filter_by(email=email).first()
-                    if subscriber:
-                        subscriber.last_email_sent = datetime.utcnow()
-                        subscriber.email_count += 1
+                # Update subscriber stats; committed together with the log flush
+                EmailService.record_deliveries(sent_ids)
+                if on_chunk:
+                    on_chunk(progress, chunk[-1][0])
+                log_buffer.flush()
+        StatsService.invalidate()
         
-        if not test_email:
-            db.session.commit()
+        if not recipient_count:
+            return 0, "No active subscribers"
         
         return sent_count, f"Newsletter sent to {sent_count} recipients"
     
     @staticmethod
-    def create_newsletter_html(articles):
-        """Create HTML content for newsletter"""
-        html_template = """
-        <html>
-        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f8f9fa;">
-            <div style="background: linear-gradient(135deg, #0d6efd, #0056b3); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
-                <h1 style="margin: 0; font-size: 28px;">📰 NewsFlash247</h1>
-                <p style="margin: 10px 0 0 0; font-size: 16px;">Daily News Digest - {{ date }}</p>
-            </div>
-            
-            <div style="background: white; padding: 30px; border-radius: 0 0 10px 10px;">
-                <h2 style="color: #333; margin-top: 0; border-bottom: 2px solid #0d6efd; padding-bottom: 10px;">
-                    Today's Top Stories
-                </h2>
-                
-                {% for article in articles %}
-                <div style="margin-bottom: 30px; padding-bottom: 20px; border-bottom: 1px solid #dee2e6;">
-                    {% if article.is_breaking %}
-                    <div style="background: #dc3545; color: white; padding: 5px 10px; border-radius: 15px; display: inline-block; font-size: 12px; font-weight: bold; margin-bottom: 10px;">
-                        🚨 BREAKING NEWS
-                    </div>
-                    {% endif %}
-                    
-                    <h3 style="color: #0d6efd; margin: 10px 0; font-size: 18px; line-height: 1.4;">
-                        {{ article.title }}
-                    </h3>
-                    
-                    <div style="background: #f8f9fa; padding: 15px; border-left: 4px solid #0d6efd; margin: 15px 0;">
-                        <p style="color: #666; margin: 0; line-height: 1.6;">
-                            {{ article.summary or article.content[:200] + '...' }}
-                        </p>
-                    </div>
-                    
-                    <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 15px;">
-                        <small style="color: #999;">
-                            📂 {{ article.category }} | 👁️ {{ article.views_count }} views | ⏱️ {{ article.reading_time }} min read
-                        </small>
-                        <small style="color: #999;">
-                            {{ article.created_at.strftime('%B %d, %Y at %I:%M %p') }}
-                        </small>
-                    </div>
-                </div>
-                {% endfor %}
-                
-                <div style="background: #0d6efd; color: white; padding: 20px; border-radius: 8px; text-align: center; margin-top: 30px;">
-                    <h3 style="margin: 0 0 10px 0;">Stay Connected</h3>
-                    <p style="margin: 0; font-size: 14px;">
-                        Visit NewsFlash247 for more breaking news and updates throughout the day.
-                    </p>
-                </div>
-                
-                <hr style="border: none; border-top: 1px solid #dee2e6; margin: 30px 0;">
-                
-                <p style="color: #999; font-size: 12px; text-align: center;">
-                    You're receiving this email because you subscribed to NewsFlash247 newsletter.<br>
-                    © 2025 NewsFlash247. All rights reserved.
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        from jinja2 import Template
-        template = Template(html_template)
-        return template.render(
-            articles=articles,
-            date=datetime.now().strftime('%B %d, %Y')
-        )
\ No newline at end of file
+    def newsletter_subject(date=None):
+        return f"NewsFlash247 Daily Digest - {(date or datetime.now()).strftime('%B %d, %Y')}"
+    
+    @staticmethod
+    def iter_recipient_batches(batch_size, after_id=0):
+        """Yield active subscribers as [(id, email, token), ...] chunks in id order"""
+        while True:
+            batch = db.session.query(
+                NewsSubscriber.id, NewsSubscriber.email, NewsSubscriber.subscription_token
+            ).filter(
+                NewsSubscriber.is_active.is_(True),
+                NewsSubscriber.id > after_id
+            ).order_by(NewsSubscriber.id).limit(batch_size).all()
+            if not batch:
+                return
+            yield [tuple(row) for row in batch]
+            after_id = batch[-1][0]
+    
+    @staticmethod
+    def record_deliveries(subscriber_ids, sent_at=None):
+        """Bump last_email_sent and email_count for a chunk with one UPDATE (not committed)"""
+        if not subscriber_ids:
+            return
+        NewsSubscriber.query.filter(NewsSubscriber.id.in_(subscriber_ids)).update({
+            'last_email_sent': sent_at or datetime.utcnow(),
+            'email_count': NewsSubscriber.email_count + 1
+        }, synchronize_session=False)
+    
+    @staticmethod
+    def unsubscribe_url(token):
+        """Absolute unsubscribe link for a subscription token"""
+        return f"{current_app.config['SITE_URL'].rstrip('/')}/unsubscribe/{token}"
+
+
+@job_handler('welcome_email')
+def run_welcome_email_job(payload):
+    if not EmailService.send_welcome_email(payload['email']):
+        raise RuntimeError(f"Welcome email to {payload['email']} was not sent")
+
+
+@job_handler('newsletter')
+def run_newsletter_job(payload):
+    article_ids = payload.get('article_ids', [])
+    articles = NewsArticle.listing().filter(NewsArticle.id.in_(article_ids)).all()
+    articles.sort(key=lambda article: article_ids.index(article.id))
+    
+    # Publish progress on the job row so any web worker can show it
+    job_id = current_job_id()
+    progress = DeliveryProgress(f'newsletter job {job_id}')
+    
+    def save_progress(progress, last_subscriber_id):
+        if job_id:
+            JobQueue.update_progress(job_id, progress.to_dict())
+    
+    sent_count, message = EmailService.send_newsletter(
+        articles, payload.get('test_email'), progress=progress, on_chunk=save_progress
+    )
+    if payload.get('test_email') and not sent_count:
+        raise RuntimeError(message)
+    return dict(progress.to_dict(), sent_count=sent_count, message=message)
@@ -0,0 +1,106 @@
+import logging
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from flask import current_app, render_template, url_for
+from models import NewsArticle
+from page_cache import cached_articles
+from conditional import make_etag
+
+logger = logging.getLogger(__name__)
+
+FEED_FORMATS = {
+    'rss': ('feed.rss.xml', 'application/rss+xml; charset=utf-8'),
+    'atom': ('feed.atom.xml', 'application/atom+xml; charset=utf-8'),
+}
+
+
+def _utc(value):
+    return value.replace(tzinfo=timezone.utc)
+
+
+class FeedService:
+    """RSS and Atom documents for published articles.
+
+    A feed is rendered once and kept in page_cache under an 'articles:' key,
+    so invalidate_article_caches() drops it on every create, edit or publish;
+    until then requests are served from memory without touching the database.
+    """
+
+    @staticmethod
+    def cache_key(feed_format, category=None):
+        return f"articles:feed:{feed_format}:{category or ''}"
+
+    @staticmethod
+    def categories():
+        """Categories that have published articles, cached alongside the feeds"""
+        return cached_articles(
+            'articles:categories',
+            lambda: frozenset(
+                category for (category,) in
+                NewsArticle.query.with_entities(NewsArticle.category).filter_by(is_published=True).distinct()
+            ),
+            ttl=current_app.config.get('FEED_CACHE_TTL', 300)
+        )
+
+    @staticmethod
+    def get_feed(feed_format, category=None):
+        """Cached {'body', 'etag', 'last_modified'} for a feed, or None for an unknown category"""
+        # Arbitrary category names must not get their own cache entries
+        if category and category not in FeedService.categories():
+            return None
+        return cached_articles(
+            FeedService.cache_key(feed_format, category),
+            lambda: FeedService.build_feed(feed_format, category),
+            ttl=current_app.config.get('FEED_CACHE_TTL', 300)
+        )
+
+    @staticmethod
+    def build_feed(feed_format, category=None):
+        template, _ = FEED_FORMATS[feed_format]
+        query = NewsArticle.listing().filter_by(is_published=True)
+        if category:
+            query = query.filter_by(category=category)
+        articles = query.order_by(NewsArticle.created_at.desc()).limit(
+            current_app.config.get('FEED_MAX_ITEMS', 20)
+        ).all()
+        if category and not articles:
+            return None
+
+        items = []
+        for article in articles:
+            published = article.published_at or article.created_at
+            updated = article.updated_at or published
+            items.append({
+                'id': article.id,
+                'title': article.title,
+                'summary': article.summary or article.excerpt,
+                'category': article.category,
+                'url': url_for('article_detail', article_id=article.id, _external=True),
+                'pub_date': format_datetime(_utc(published), usegmt=True),
+                'published': _utc(published).isoformat(),
+                'updated': _utc(updated).isoformat()
+            })
+
+        last_modified = max(
+            (article.updated_at or article.created_at for article in articles), default=None
+        ) or datetime.utcnow()
+        if category:
+            self_url = url_for('category_feed', category=category, feed_format=feed_format, _external=True)
+        else:
+            self_url = url_for('feed', feed_format=feed_format, _external=True)
+
+        body = render_template(
+            template,
+            items=items,
+            category=category,
+            self_url=self_url,
+            home_url=url_for('home', _external=True),
+            build_date=format_datetime(_utc(last_modified), usegmt=True),
+            updated=_utc(last_modified).isoformat()
+        )
+        logger.info(f"Rendered {feed_format} feed{' for ' + category if category else ''} ({len(items)} items)")
+        return {
+            'body': body,
+            'etag': make_etag(body),
+            'last_modified': last_modified
+        }
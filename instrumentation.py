@@ -0,0 +1,197 @@
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from flask_login import current_user
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds in seconds, as in the Prometheus client defaults
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    """Timings collected while one sampled request runs"""
+
+    __slots__ = ('started', 'queries', 'db_time', 'render_time', 'render_depth', 'render_started', 'timings')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_depth = 0
+        self.render_started = 0.0
+        self.timings = {}
+
+
+def _current():
+    """Metrics for the running request, or None when not sampled / outside a request"""
+    return g.get('_request_metrics') if has_request_context() else None
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = {}  # labels -> [bucket counts..., +Inf count]
+        self.sums = {}
+
+    def observe(self, labels, value):
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(BUCKETS) + 1)
+            self.sums[labels] = 0.0
+        counts[bisect_left(BUCKETS, value)] += 1
+        self.sums[labels] += value
+
+
+class MetricsRegistry:
+    """Process-local request metrics, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}  # (endpoint, method, status) -> count
+        self.queries = {}  # endpoint -> count
+        self.histograms = {
+            'newsflash_request_duration_seconds': ('Time spent handling a request', Histogram()),
+            'newsflash_request_db_seconds': ('Time spent in SQL per request', Histogram()),
+            'newsflash_request_render_seconds': ('Time spent rendering templates per request', Histogram()),
+        }
+
+    def record(self, endpoint, method, status, metrics, total):
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.queries[endpoint] = self.queries.get(endpoint, 0) + metrics.queries
+            labels = (endpoint,)
+            self.histograms['newsflash_request_duration_seconds'][1].observe(labels, total)
+            self.histograms['newsflash_request_db_seconds'][1].observe(labels, metrics.db_time)
+            self.histograms['newsflash_request_render_seconds'][1].observe(labels, metrics.render_time)
+
+    def render(self):
+        lines = [
+            '# HELP newsflash_requests_total Sampled requests by endpoint, method and status',
+            '# TYPE newsflash_requests_total counter',
+        ]
+        with self._lock:
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'newsflash_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}'
+                )
+            lines += [
+                '# HELP newsflash_sql_queries_total SQL statements executed by sampled requests',
+                '# TYPE newsflash_sql_queries_total counter',
+            ]
+            for endpoint, count in sorted(self.queries.items()):
+                lines.append(f'newsflash_sql_queries_total{{endpoint="{endpoint}"}} {count}')
+            for name, (help_text, histogram) in self.histograms.items():
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+                for labels, counts in sorted(histogram.counts.items()):
+                    endpoint = labels[0]
+                    cumulative = 0
+                    for bound, count in zip(BUCKETS + ('+Inf',), counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{endpoint="{endpoint}",le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_sum{{endpoint="{endpoint}"}} {histogram.sums[labels]:.6f}')
+                    lines.append(f'{name}_count{{endpoint="{endpoint}"}} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+
+class Instrumentation:
+    """Per-request SQL, template and total timings.
+
+    A request is sampled with probability METRICS_SAMPLE_RATE; unsampled
+    requests and background threads only pay for one context lookup in each
+    hook. Sampled requests feed the histograms behind /metrics; admins get a
+    Server-Timing header, and so does everyone with SERVER_TIMING_HEADER on.
+    """
+
+    def __init__(self):
+        self.registry = MetricsRegistry()
+        self.sample_rate = 0.0
+        self.server_timing = False
+
+    def init_app(self, app):
+        self.sample_rate = app.config.get('METRICS_SAMPLE_RATE', 1.0)
+        self.server_timing = app.config.get('SERVER_TIMING_HEADER', False)
+        if self.sample_rate <= 0:
+            return
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        app.jinja_env.template_class = _timed_template_class(app.jinja_env.template_class)
+
+    def _start(self):
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            g._request_metrics = RequestMetrics()
+
+    def _finish(self, response):
+        metrics = _current()
+        if metrics is None or request.endpoint == 'metrics':
+            return response
+        total = time.perf_counter() - metrics.started
+        self.registry.record(
+            request.endpoint or 'unknown', request.method, response.status_code, metrics, total
+        )
+        # Timings reveal what the database is doing, so anonymous visitors only get them on request
+        if self.server_timing or (current_user.is_authenticated and current_user.is_admin):
+            parts = [
+                f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+                f'render;dur={metrics.render_time * 1000:.1f}',
+            ]
+            parts += [f'{name};dur={value * 1000:.1f}' for name, value in metrics.timings.items()]
+            parts.append(f'total;dur={total * 1000:.1f}')
+            response.headers['Server-Timing'] = ', '.join(parts)
+        return response
+
+    @contextmanager
+    def track(self, name):
+        """Add the time spent in the block to the request's Server-Timing under name"""
+        metrics = _current()
+        if metrics is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            metrics.timings[name] = metrics.timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current() is not None:
+        conn.info['_query_started'] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current()
+    started = conn.info.pop('_query_started', None)
+    if metrics is not None and started is not None:
+        metrics.queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def _timed_template_class(base):
+    class TimedTemplate(base):
+        def render(self, *args, **kwargs):
+            metrics = _current()
+            if metrics is None:
+                return super().render(*args, **kwargs)
+            # A template rendered while another one renders is counted once, inside the outer one
+            if metrics.render_depth == 0:
+                metrics.render_started = time.perf_counter()
+            metrics.render_depth += 1
+            try:
+                return super().render(*args, **kwargs)
+            finally:
+                # Also when the template raises, so later renders are still timed
+                metrics.render_depth -= 1
+                if metrics.render_depth == 0:
+                    metrics.render_time += time.perf_counter() - metrics.render_started
+
+    return TimedTemplate
+
+
+instrumentation = Instrumentation()
@@ -0,0 +1,274 @@
+import json
+import os
+import socket
+import threading
+import time
+import logging
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from app import db
+from models import EmailJob
+
+logger = logging.getLogger(__name__)
+
+# job_type -> callable(payload) registered with @job_handler
+_handlers = {}
+
+# Id of the job the current thread is running, for handlers that report progress
+_current = threading.local()
+
+
+def current_job_id():
+    return getattr(_current, 'job_id', None)
+
+
+def job_handler(job_type):
+    """Register a function that runs jobs of the given type"""
+    def decorator(func):
+        _handlers[job_type] = func
+        return func
+    return decorator
+
+
+class Heartbeat:
+    """Calls touch(connection) every interval seconds while a long task runs.
+
+    Writes go through their own connection and transaction, so a task that
+    is busy between checkpoints never looks abandoned and nothing it has
+    pending in db.session is committed early.
+    """
+
+    def __init__(self, touch, interval):
+        self.touch = touch
+        self.interval = max(1.0, interval)
+        self._app = current_app._get_current_object()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='heartbeat', daemon=True)
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                with self._app.app_context(), db.engine.begin() as connection:
+                    self.touch(connection)
+            except Exception as e:
+                logger.error(f"Heartbeat failed: {str(e)}")
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+
+
+class JobQueue:
+    @staticmethod
+    def enqueue(job_type, payload=None, max_attempts=None, delay=0):
+        """Persist a job for the worker pool and return it"""
+        job = EmailJob(
+            job_type=job_type,
+            payload=json.dumps(payload or {}),
+            status='queued',
+            max_attempts=max_attempts or 5,
+            run_at=datetime.utcnow() + timedelta(seconds=delay)
+        )
+        db.session.add(job)
+        db.session.commit()
+        logger.info(f"Queued {job_type} job {job.id}")
+        return job
+
+    @staticmethod
+    def backoff_seconds(attempts, base=30, cap=3600):
+        """Exponential backoff before the next attempt"""
+        return min(cap, base * (2 ** max(0, attempts - 1)))
+
+    @staticmethod
+    def requeue_stale(lock_timeout):
+        """Put jobs back in the queue whose worker died mid-run.
+
+        A running job refreshes locked_at through its Heartbeat, so only jobs
+        whose worker is gone match. Those without attempts left are failed.
+        """
+        now = datetime.utcnow()
+        stale = EmailJob.query.filter(
+            EmailJob.status == 'running',
+            EmailJob.locked_at < now - timedelta(seconds=lock_timeout)
+        )
+        failed = stale.filter(EmailJob.attempts >= EmailJob.max_attempts).update({
+            'status': 'failed', 'locked_at': None, 'locked_by': None, 'finished_at': now,
+            'last_error': 'Worker stopped responding'
+        }, synchronize_session=False)
+        count = stale.update({'status': 'queued', 'locked_at': None, 'locked_by': None}, synchronize_session=False)
+        db.session.commit()
+        if failed:
+            logger.error(f"Failed {failed} stale jobs that had no attempts left")
+        if count:
+            logger.warning(f"Requeued {count} stale jobs")
+        return count
+
+    @staticmethod
+    def claim(worker_id):
+        """Atomically take the next due job, or return None"""
+        now = datetime.utcnow()
+        candidates = EmailJob.query.with_entities(EmailJob.id).filter(
+            EmailJob.status == 'queued',
+            EmailJob.attempts < EmailJob.max_attempts,
+            EmailJob.run_at <= now
+        ).order_by(EmailJob.run_at, EmailJob.id).limit(5).all()
+
+        for (job_id,) in candidates:
+            # Conditional update so that only one worker wins each job
+            claimed = EmailJob.query.filter(
+                EmailJob.id == job_id,
+                EmailJob.status == 'queued',
+                EmailJob.attempts < EmailJob.max_attempts
+            ).update(
+                {'status': 'running', 'locked_at': now, 'locked_by': worker_id,
+                 'attempts': EmailJob.attempts + 1},
+                synchronize_session=False
+            )
+            db.session.commit()
+            if claimed:
+                return db.session.get(EmailJob, job_id)
+        return None
+
+    @staticmethod
+    def run(job, base_backoff=30, lock_timeout=900):
+        """Run a claimed job and record the outcome"""
+        handler = _handlers.get(job.job_type)
+        _current.job_id = job.id
+        job_id = job.id
+
+        def touch(connection):
+            connection.execute(
+                update(EmailJob).where(EmailJob.id == job_id, EmailJob.status == 'running')
+                .values(locked_at=datetime.utcnow())
+            )
+
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type '{job.job_type}'")
+            # Keep the lock fresh so requeue_stale never hands a live job to a second worker
+            with Heartbeat(touch, lock_timeout / 3):
+                result = handler(json.loads(job.payload or '{}'))
+            job.status = 'done'
+            job.result = json.dumps(result) if result is not None else None
+            job.last_error = None
+            job.finished_at = datetime.utcnow()
+            logger.info(f"Job {job.id} ({job.job_type}) done")
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(EmailJob, job.id)
+            job.last_error = str(e)
+            if job.attempts >= job.max_attempts:
+                job.status = 'failed'
+                job.finished_at = datetime.utcnow()
+                logger.error(f"Job {job.id} ({job.job_type}) failed permanently: {str(e)}")
+            else:
+                job.status = 'queued'
+                job.run_at = datetime.utcnow() + timedelta(
+                    seconds=JobQueue.backoff_seconds(job.attempts, base_backoff)
+                )
+                logger.warning(f"Job {job.id} ({job.job_type}) failed, retrying at {job.run_at}: {str(e)}")
+        finally:
+            _current.job_id = None
+        job.locked_at = None
+        job.locked_by = None
+        db.session.commit()
+        return job
+
+    @staticmethod
+    def update_progress(job_id, progress):
+        """Store progress for a running job (committed with the caller's transaction)"""
+        EmailJob.query.filter_by(id=job_id).update(
+            {'result': json.dumps(progress), 'locked_at': datetime.utcnow()}, synchronize_session=False
+        )
+    
+    @staticmethod
+    def work_once(worker_id, base_backoff=30, lock_timeout=900):
+        """Claim and run a single job; returns False when the queue is empty"""
+        job = JobQueue.claim(worker_id)
+        if job is None:
+            return False
+        JobQueue.run(job, base_backoff, lock_timeout)
+        return True
+
+
+class JobWorkerPool:
+    """Threads that poll the email_jobs table, in the web process or standalone"""
+
+    def __init__(self, app, threads=1, poll_interval=2.0):
+        self.app = app
+        self.threads = max(1, threads)
+        self.poll_interval = poll_interval
+        self.lock_timeout = app.config.get('JOBS_LOCK_TIMEOUT', 900)
+        self.base_backoff = app.config.get('JOBS_RETRY_BACKOFF', 30)
+        self._stop = threading.Event()
+        self._threads = []
+        self._id_prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    def start(self):
+        for index in range(self.threads):
+            thread = threading.Thread(
+                target=self._loop,
+                args=(f"{self._id_prefix}:{index}",),
+                name=f"email-job-worker-{index}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"Started {self.threads} email job worker(s)")
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def run_forever(self):
+        """Run the pool in the foreground until interrupted"""
+        self.start()
+        try:
+            while not self._stop.is_set():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def _loop(self, worker_id):
+        last_stale_check = 0
+        while not self._stop.is_set():
+            worked = False
+            try:
+                with self.app.app_context():
+                    if time.monotonic() - last_stale_check > self.lock_timeout / 2:
+                        JobQueue.requeue_stale(self.lock_timeout)
+                        last_stale_check = time.monotonic()
+                    worked = JobQueue.work_once(worker_id, self.base_backoff, self.lock_timeout)
+            except Exception as e:
+                logger.error(f"Job worker {worker_id} error: {str(e)}")
+            if not worked:
+                self._stop.wait(self.poll_interval)
+
+
+_in_process_pool = None
+_in_process_lock = threading.Lock()
+
+
+def ensure_in_process_workers(app):
+    """Start the in-process worker pool once, if enabled in config"""
+    global _in_process_pool
+    if _in_process_pool is not None or not app.config.get('JOBS_IN_PROCESS'):
+        return _in_process_pool
+    with _in_process_lock:
+        if _in_process_pool is None:
+            pool = JobWorkerPool(
+                app,
+                threads=app.config.get('JOBS_WORKER_THREADS', 1),
+                poll_interval=app.config.get('JOBS_POLL_INTERVAL', 2.0)
+            )
+            pool.start()
+            _in_process_pool = pool
+    return _in_process_pool
@@ -1,23 +1,66 @@
 from app import app, db, login_manager
-from flask import render_template, request, redirect, url_for, session, flash, jsonify
+from flask import render_template, request, redirect, url_for, session, flash, jsonify, send_file, abort
 from flask_login import login_user, logout_user, login_required, current_user
-from models import User, NewsArticle, NewsSubscriber, EmailLog, SiteSettings
+from models import User, NewsArticle, NewsSubscriber, EmailLog, SiteSettings, EmailJob, NewsletterCampaign
 from email_service import EmailService
+from job_queue import JobQueue, ensure_in_process_workers
+from campaigns import CampaignService
+from page_cache import cached_articles, invalidate_article_caches
+from view_counter import view_counter
+from user_cache import user_cache
+from stats_service import StatsService
+from pagination import keyset_paginate, approximate_count
+from search import SearchIndex
+from conditional import make_etag, conditional_response
+from feeds import FeedService, FEED_FORMATS
+from delivery import active_progress
+from db_routing import replica_reads
+from assets import asset_manifest
+from instrumentation import instrumentation
+from profiler import request_profiler
+from markupsafe import Markup
+import commands  # noqa: F401  (registers flask CLI commands)
+import json
 import logging
 from datetime import datetime
+from sqlalchemy import func
 from werkzeug.security import generate_password_hash, check_password_hash
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
+asset_manifest.init_app(app)
+instrumentation.init_app(app)
+request_profiler.init_app(app)
+
+@app.before_request
+def start_background_workers():
+    ensure_in_process_workers(app)
+    view_counter.start()
+
+def site_settings():
+    """Site title and description with defaults, served from the settings cache"""
+    values = SiteSettings.all_settings()
+    defaults = {
+        'site_title': 'NewsFlash247',
+        'site_description': 'Your trusted source for breaking news'
+    }
+    # Only settings that were never saved fall back; an empty value is deliberate
+    return {key: default if values.get(key) is None else values[key] for key, default in defaults.items()}
+
+@app.context_processor
+def inject_site_settings():
+    return {'site': site_settings()}
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    with instrumentation.track('auth'):
+        return user_cache.load(int(user_id))
 
-@app.route('/')
-def home():
+def render_home_news():
+    """Render the latest-news list; the result is shared by every visitor"""
     # Get published news articles from database
-    news_articles = NewsArticle.query.filter_by(is_published=True).order_by(NewsArticle.created_at.desc()).limit(10).all()
+    news_articles = NewsArticle.listing().filter_by(is_published=True).order_by(NewsArticle.created_at.desc()).limit(10).all()
     
     # Convert to list of dicts for template compatibility
     news = []
@@ -25,7 +68,7 @@ def home():
         news.append({
             'id': article.id,
             'title': article.title,
-            'content': article.summary or article.content[:300] + '...',
+            'content': article.summary or article.excerpt,
             'category': article.category,
             'timestamp': article.created_at.strftime('%Y-%m-%d %H:%M:%S'),
             'is_breaking': article.is_breaking,
@@ -33,7 +76,166 @@ def home():
             'reading_time': article.reading_time
         })
     
-    return render_template('index.html', news=news)
+    return Markup(render_template('_news_list.html', news=news)), len(news)
+
+@app.route('/')
+@replica_reads
+def home():
+    # The article list is cached; the layout around it varies per user and is rendered per request
+    news_html, news_count = cached_articles('articles:home', render_home_news)
+    
+    return render_template('index.html', news_html=news_html, news_count=news_count)
+
+@app.route('/article/<int:article_id>')
+@replica_reads
+def article_detail(article_id):
+    article = NewsArticle.query.get_or_404(article_id)
+    
+    # Drafts are only visible to admins
+    if not article.is_published and not (current_user.is_authenticated and current_user.is_admin):
+        abort(404)
+    
+    # Views are buffered in memory and written in batches
+    view_counter.record(article.id)
+    views_count = article.views_count + view_counter.pending(article.id)
+    
+    return render_template('article.html', article=article, views_count=views_count)
+
+def search_params():
+    query = request.args.get('q', '').strip()
+    category = request.args.get('category', '').strip() or None
+    page = max(1, request.args.get('page', 1, type=int))
+    return query, category, page
+
+@app.route('/search')
+@replica_reads
+def search():
+    query, category, page = search_params()
+    per_page = 10
+    
+    results = SearchIndex.search(query, category, limit=per_page + 1, offset=(page - 1) * per_page) if query else []
+    has_next = len(results) > per_page
+    
+    return render_template('search.html', query=query, category=category, page=page,
+                           results=results[:per_page], has_next=has_next)
+
+@app.route('/api/search')
+@replica_reads
+def api_search():
+    query, category, page = search_params()
+    limit = min(50, max(1, request.args.get('limit', 10, type=int)))
+    
+    results = SearchIndex.search(query, category, limit=limit, offset=(page - 1) * limit) if query else []
+    
+    return jsonify({
+        'query': query,
+        'category': category,
+        'page': page,
+        'results': [article_json(article) for article in results]
+    })
+
+def article_json(article, with_content=False):
+    # View counts are left out: they change on every read without touching updated_at
+    data = {
+        'id': article.id,
+        'title': article.title,
+        'summary': article.summary or article.excerpt,
+        'category': article.category,
+        'is_breaking': article.is_breaking,
+        'reading_time': article.reading_time,
+        'created_at': article.created_at.isoformat(),
+        'updated_at': (article.updated_at or article.created_at).isoformat(),
+        'url': url_for('article_detail', article_id=article.id, _external=True)
+    }
+    if with_content:
+        data['content'] = article.content
+    return data
+
+def published_articles_filter(category=None):
+    criteria = [NewsArticle.is_published.is_(True)]
+    if category:
+        criteria.append(NewsArticle.category == category)
+    return criteria
+
+@app.route('/api/articles')
+@replica_reads
+def api_articles():
+    category = request.args.get('category', '').strip() or None
+    after = request.args.get('cursor')
+    before = request.args.get('before')
+    per_page = min(50, max(1, request.args.get('per_page', 20, type=int)))
+    criteria = published_articles_filter(category)
+    
+    # Any edit, publish or delete moves the newest timestamp or the row count
+    latest, count = db.session.query(
+        func.max(func.coalesce(NewsArticle.updated_at, NewsArticle.created_at)),
+        func.count(NewsArticle.id)
+    ).filter(*criteria).one()
+    etag = make_etag('articles', latest, count, category, after, before, per_page)
+    
+    def build():
+        page = keyset_paginate(
+            NewsArticle.listing().filter(*criteria),
+            NewsArticle.created_at, NewsArticle.id,
+            after=after, before=before, per_page=per_page
+        )
+        return jsonify({
+            'articles': [article_json(article) for article in page.items],
+            'total': count,
+            'next_cursor': page.next_cursor,
+            'prev_cursor': page.prev_cursor
+        })
+    
+    return conditional_response(etag, latest, build)
+
+@app.route('/api/articles/<int:article_id>')
+@replica_reads
+def api_article(article_id):
+    row = db.session.query(NewsArticle.updated_at, NewsArticle.created_at).filter(
+        NewsArticle.id == article_id, *published_articles_filter()
+    ).first()
+    if row is None:
+        return jsonify({'error': 'Article not found'}), 404
+    
+    last_modified = row.updated_at or row.created_at
+    etag = make_etag('article', article_id, last_modified)
+    
+    def build():
+        return jsonify(article_json(db.session.get(NewsArticle, article_id), with_content=True))
+    
+    return conditional_response(etag, last_modified, build)
+
+def feed_response(feed_format, category=None):
+    feed = FeedService.get_feed(feed_format, category)
+    if feed is None:
+        abort(404)
+    
+    response = conditional_response(
+        feed['etag'], feed['last_modified'], lambda: feed['body'],
+        cache_control=f"public, max-age={app.config['FEED_MAX_AGE']}"
+    )
+    response.content_type = FEED_FORMATS[feed_format][1]
+    return response
+
+@app.route('/feed.<any(rss, atom):feed_format>')
+@replica_reads
+def feed(feed_format):
+    return feed_response(feed_format)
+
+@app.route('/category/<category>/feed.<any(rss, atom):feed_format>')
+@replica_reads
+def category_feed(category, feed_format):
+    return feed_response(feed_format, category)
+
+@app.route('/metrics')
+def metrics():
+    # Scrapers authenticate with METRICS_TOKEN; admins can look from the browser
+    token = app.config.get('METRICS_TOKEN')
+    authorized = bool(token) and request.headers.get('Authorization') == f'Bearer {token}'
+    if not authorized and not (current_user.is_authenticated and current_user.is_admin):
+        return 'Forbidden', 403
+    
+    return instrumentation.registry.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -110,20 +312,18 @@ def register():
 @login_required
 def dashboard():
     # Get statistics
-    subscriber_count = NewsSubscriber.query.filter_by(is_active=True).count()
-    article_count = NewsArticle.query.filter_by(is_published=True).count()
-    total_views = db.session.query(db.func.sum(NewsArticle.views_count)).scalar() or 0
+    stats = StatsService.get_stats()
     
     # Get recent articles for admin users
     recent_articles = []
     if current_user.is_admin:
-        recent_articles = NewsArticle.query.order_by(NewsArticle.created_at.desc()).limit(5).all()
+        recent_articles = NewsArticle.listing().order_by(NewsArticle.created_at.desc()).limit(5).all()
     
     return render_template('dashboard.html', 
                          user=current_user,
-                         subscriber_count=subscriber_count,
-                         article_count=article_count,
-                         total_views=total_views,
+                         subscriber_count=stats['total_subscribers'],
+                         article_count=stats['published_articles'],
+                         total_views=stats['total_views'],
                          recent_articles=recent_articles)
 
 @app.route('/subscribe', methods=['GET', 'POST'])
@@ -147,34 +347,34 @@ def subscribe():
     
     return render_template('subscribe.html')
 
+@app.route('/unsubscribe/<token>')
+def unsubscribe(token):
+    success, message = EmailService.unsubscribe_email(token)
+    flash(message, 'success' if success else 'error')
+    return render_template('subscribe.html')
+
 @app.route('/logout')
 @login_required
 def logout():
     logout_user()
+    user_cache.clear_session()
     flash('You have been logged out successfully.', 'info')
     return redirect(url_for('home'))
 
 # Admin Panel Routes
 @app.route('/admin')
 @login_required
+@replica_reads
 def admin_panel():
     if not current_user.is_admin:
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('dashboard'))
     
     # Get admin dashboard statistics
-    stats = {
-        'total_articles': NewsArticle.query.count(),
-        'published_articles': NewsArticle.query.filter_by(is_published=True).count(),
-        'breaking_news': NewsArticle.query.filter_by(is_breaking=True, is_published=True).count(),
-        'total_subscribers': NewsSubscriber.query.filter_by(is_active=True).count(),
-        'total_views': db.session.query(db.func.sum(NewsArticle.views_count)).scalar() or 0,
-        'emails_sent': EmailLog.query.filter_by(status='sent').count(),
-        'failed_emails': EmailLog.query.filter_by(status='failed').count()
-    }
+    stats = StatsService.get_stats()
     
     # Get recent articles
-    recent_articles = NewsArticle.query.order_by(NewsArticle.created_at.desc()).limit(10).all()
+    recent_articles = NewsArticle.listing(with_author=True).order_by(NewsArticle.created_at.desc()).limit(10).all()
     
     # Get recent subscribers
     recent_subscribers = NewsSubscriber.query.order_by(NewsSubscriber.subscribed_at.desc()).limit(10).all()
@@ -186,15 +386,22 @@ def admin_panel():
 
 @app.route('/admin/articles')
 @login_required
+@replica_reads
 def admin_articles():
     if not current_user.is_admin:
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('dashboard'))
     
-    page = request.args.get('page', 1, type=int)
-    articles = NewsArticle.query.order_by(NewsArticle.created_at.desc()).paginate(
-        page=page, per_page=10, error_out=False
+    # Keyset pagination: ?after=<cursor> for older articles, ?before=<cursor> for newer
+    articles = keyset_paginate(
+        NewsArticle.listing(with_author=True),
+        NewsArticle.created_at, NewsArticle.id,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=10
     )
+    if app.config['PAGINATION_APPROXIMATE_TOTALS']:
+        articles.total = approximate_count(NewsArticle)
     
     return render_template('admin/articles.html', articles=articles)
 
@@ -231,6 +438,9 @@ def admin_new_article():
         try:
             db.session.add(article)
             db.session.commit()
+            invalidate_article_caches()
+            StatsService.invalidate()
+            SearchIndex.index_article(article)
             flash('Article created successfully!', 'success')
             return redirect(url_for('admin_articles'))
         except Exception as e:
@@ -268,6 +478,9 @@ def admin_edit_article(article_id):
         
         try:
             db.session.commit()
+            invalidate_article_caches()
+            StatsService.invalidate()
+            SearchIndex.index_article(article)
             flash('Article updated successfully!', 'success')
             return redirect(url_for('admin_articles'))
         except Exception as e:
@@ -279,15 +492,21 @@ def admin_edit_article(article_id):
 
 @app.route('/admin/subscribers')
 @login_required
+@replica_reads
 def admin_subscribers():
     if not current_user.is_admin:
         flash('Access denied. Admin privileges required.', 'error')
         return redirect(url_for('dashboard'))
     
-    page = request.args.get('page', 1, type=int)
-    subscribers = NewsSubscriber.query.order_by(NewsSubscriber.subscribed_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
+    subscribers = keyset_paginate(
+        NewsSubscriber.query,
+        NewsSubscriber.subscribed_at, NewsSubscriber.id,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=20
     )
+    if app.config['PAGINATION_APPROXIMATE_TOTALS']:
+        subscribers.total = approximate_count(NewsSubscriber)
     
     return render_template('admin/subscribers.html', subscribers=subscribers)
 
@@ -302,17 +521,20 @@ def admin_newsletter():
         action = request.form.get('action')
         
         if action == 'send_newsletter':
-            # Get recent published articles
-            articles = NewsArticle.query.filter_by(is_published=True).order_by(
-                NewsArticle.created_at.desc()
-            ).limit(5).all()
+            # Never start a second campaign while one is still delivering
+            unfinished = CampaignService.unfinished()
+            if unfinished:
+                flash(f'Campaign #{unfinished.id} is still {unfinished.status}. '
+                      f'Interrupted campaigns are resumed with "flask send-digest".', 'warning')
+                return redirect(url_for('admin_newsletter'))
             
-            if not articles:
+            campaign = CampaignService.create_campaign()
+            if not campaign:
                 flash('No articles available to send.', 'error')
                 return render_template('admin/newsletter.html')
             
-            sent_count, message = EmailService.send_newsletter(articles)
-            flash(f'{message}', 'success' if sent_count > 0 else 'warning')
+            job = JobQueue.enqueue('newsletter_campaign', {'campaign_id': campaign.id}, max_attempts=1)
+            flash(f'Newsletter campaign #{campaign.id} queued for delivery (job #{job.id}).', 'success')
             
         elif action == 'send_test':
             test_email = request.form.get('test_email', '').strip()
@@ -321,7 +543,7 @@ def admin_newsletter():
                 return render_template('admin/newsletter.html')
             
             # Get recent published articles
-            articles = NewsArticle.query.filter_by(is_published=True).order_by(
+            articles = NewsArticle.listing().filter_by(is_published=True).order_by(
                 NewsArticle.created_at.desc()
             ).limit(5).all()
             
@@ -329,22 +551,86 @@ def admin_newsletter():
                 flash('No articles available to send.', 'error')
                 return render_template('admin/newsletter.html')
             
-            sent_count, message = EmailService.send_newsletter(articles, test_email)
-            flash(f'Test newsletter sent to {test_email}' if sent_count > 0 else 'Failed to send test newsletter', 
-                  'success' if sent_count > 0 else 'error')
+            job = EmailService.queue_newsletter(articles, test_email)
+            flash(f'Test newsletter to {test_email} queued (job #{job.id}).', 'success')
     
     # Get newsletter statistics
+    all_stats = StatsService.get_stats()
     stats = {
-        'active_subscribers': NewsSubscriber.query.filter_by(is_active=True).count(),
-        'recent_articles': NewsArticle.query.filter_by(is_published=True).count(),
-        'emails_sent_today': EmailLog.query.filter(
-            EmailLog.sent_at >= datetime.utcnow().date(),
-            EmailLog.status == 'sent'
-        ).count()
+        'active_subscribers': all_stats['total_subscribers'],
+        'recent_articles': all_stats['published_articles'],
+        'emails_sent_today': all_stats['emails_sent_today']
     }
     
     return render_template('admin/newsletter.html', stats=stats)
 
+@app.route('/admin/newsletter/progress')
+@login_required
+def admin_newsletter_progress():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    # Live counters exist only in the process running the campaign; the job
+    # row carries the last per-chunk snapshot for every other worker
+    latest_job = EmailJob.query.filter(
+        EmailJob.job_type.in_(('newsletter', 'newsletter_campaign'))
+    ).order_by(EmailJob.id.desc()).first()
+    latest = None
+    if latest_job:
+        latest = latest_job.to_dict()
+        latest['progress'] = json.loads(latest_job.result) if latest_job.result else None
+    
+    campaign = NewsletterCampaign.query.order_by(NewsletterCampaign.id.desc()).first()
+    
+    return jsonify({
+        'live': active_progress(),
+        'latest_job': latest,
+        'latest_campaign': campaign.to_dict() if campaign else None
+    })
+
+@app.route('/admin/jobs')
+@login_required
+def admin_jobs():
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    status = request.args.get('status')
+    query = EmailJob.query
+    if status:
+        query = query.filter_by(status=status)
+    jobs = query.order_by(EmailJob.id.desc()).limit(50).all()
+    
+    return jsonify({'jobs': [job.to_dict() for job in jobs]})
+
+@app.route('/admin/jobs/<int:job_id>')
+@login_required
+def admin_job_status(job_id):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    job = EmailJob.query.get_or_404(job_id)
+    return jsonify(job.to_dict())
+
+@app.route('/admin/profiles')
+@login_required
+def admin_profiles():
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.', 'error')
+        return redirect(url_for('dashboard'))
+    
+    return render_template('admin/profiles.html', profiles=request_profiler.store.recent())
+
+@app.route('/admin/profiles/<name>.prof')
+@login_required
+def admin_profile_download(name):
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin privileges required'}), 403
+    
+    path = request_profiler.store.path(name)
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=f'{name}.prof')
+
 @app.route('/admin/settings', methods=['GET', 'POST'])
 @login_required
 def admin_settings():
@@ -357,104 +643,32 @@ def admin_settings():
         site_title = request.form.get('site_title', 'NewsFlash247')
         site_description = request.form.get('site_description', '')
         
-        SiteSettings.set_setting('site_title', site_title, 'Website title')
-        SiteSettings.set_setting('site_description', site_description, 'Website description')
+        SiteSettings.set_settings(
+            {'site_title': site_title, 'site_description': site_description},
+            {'site_title': 'Website title', 'site_description': 'Website description'}
+        )
         
         flash('Settings updated successfully!', 'success')
     
     # Get current settings
-    settings = {
-        'site_title': SiteSettings.get_setting('site_title', 'NewsFlash247'),
-        'site_description': SiteSettings.get_setting('site_description', 'Your trusted source for breaking news')
-    }
+    settings = site_settings()
     
     return render_template('admin/settings.html', settings=settings)
 
-# Initialize admin user and sample data
-def init_database():
-    with app.app_context():
-        # Create admin user if none exists
-        admin = User.query.filter_by(is_admin=True).first()
-        if not admin:
-            admin_user = User(
-                email='admin@newsflash247.com',
-                first_name='Admin',
-                last_name='User',
-                is_admin=True
-            )
-            admin_user.set_password('admin123')
-            
-            try:
-                db.session.add(admin_user)
-                db.session.commit()
-                logging.info("Admin user created: admin@newsflash247.com / admin123")
-                
-                # Create sample articles
-                sample_articles = [
-                    {
-                        'title': 'Tech Innovation Summit 2025 Announces Breakthrough AI Developments',
-                        'content': 'Leading technology companies unveiled groundbreaking artificial intelligence solutions at this year\'s summit, promising to revolutionize healthcare, education, and sustainable energy sectors. The innovations showcase practical applications that could transform how we interact with technology in our daily lives.',
-                        'summary': 'Leading tech companies reveal groundbreaking AI solutions at the 2025 summit.',
-                        'category': 'Technology',
-                        'is_breaking': True,
-                        'is_published': True
-                    },
-                    {
-                        'title': 'Global Climate Initiative Reaches Historic Milestone',
-                        'content': 'International cooperation efforts have successfully reduced carbon emissions by 15% this quarter, marking significant progress toward the 2030 sustainability goals. This achievement represents unprecedented collaboration between nations and demonstrates the effectiveness of coordinated environmental policies.',
-                        'summary': 'International efforts reduce carbon emissions by 15% this quarter.',
-                        'category': 'Environment',
-                        'is_breaking': False,
-                        'is_published': True
-                    },
-                    {
-                        'title': 'Economic Markets Show Strong Recovery Signals',
-                        'content': 'Financial analysts report positive trends across major stock exchanges, with renewable energy and healthcare sectors leading the growth trajectory. Market confidence continues to strengthen as investors respond to sustainable business practices and innovative healthcare solutions.',
-                        'summary': 'Financial markets show positive trends with renewable energy leading growth.',
-                        'category': 'Business',
-                        'is_breaking': False,
-                        'is_published': True
-                    },
-                    {
-                        'title': 'Educational Reform Initiative Launches Nationwide',
-                        'content': 'New educational programs focusing on digital literacy and critical thinking skills are being implemented across public schools, aiming to prepare students for the evolving job market. The comprehensive reform includes teacher training, curriculum updates, and technology integration.',
-                        'summary': 'National education reform focuses on digital literacy and critical thinking.',
-                        'category': 'Education',
-                        'is_breaking': False,
-                        'is_published': True
-                    }
-                ]
-                
-                for article_data in sample_articles:
-                    article = NewsArticle(
-                        title=article_data['title'],
-                        content=article_data['content'],
-                        summary=article_data['summary'],
-                        category=article_data['category'],
-                        is_breaking=article_data['is_breaking'],
-                        is_published=article_data['is_published'],
-                        author_id=admin_user.id,
-                        published_at=datetime.utcnow()
-                    )
-                    db.session.add(article)
-                
-                db.session.commit()
-                logging.info("Sample articles created")
-                
-            except Exception as e:
-                db.session.rollback()
-                logging.error(f"Failed to initialize database: {str(e)}")
-
-# Initialize database on startup
-init_database()
-
 @app.errorhandler(404)
 def not_found(error):
     return render_template('404.html'), 404
 
 @app.errorhandler(500)
 def internal_error(error):
+    # Leave a failed transaction behind so the error page itself can render
+    db.session.rollback()
     return render_template('500.html'), 500
 
 if __name__ == '__main__':
+    # Local development: make sure the database exists before serving
+    from seed import init_db, seed_database
+    with app.app_context():
+        init_db()
+        seed_database()
     app.run(host='0.0.0.0', port=5000, debug=True)
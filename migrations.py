@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime
+from sqlalchemy import inspect, text
+from app import db
+
+logger = logging.getLogger(__name__)
+
+# (version, description, function(connection)), applied in order by `flask db-upgrade`.
+# `flask db-init` builds new databases with the current schema and then records
+# every step here, so each step must be a no-op when its change is already present.
+MIGRATIONS = []
+
+
+def migration(version, description):
+    def decorator(func):
+        MIGRATIONS.append((version, description, func))
+        return func
+    return decorator
+
+
+def _columns(connection, table):
+    return {column['name'] for column in inspect(connection).get_columns(table)}
+
+
+def _add_column(connection, table, column, ddl):
+    if column not in _columns(connection, table):
+        connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+
+@migration(1, 'Stored word count, reading time and excerpt on news_articles')
+def add_article_text_stats(connection):
+    _add_column(connection, 'news_articles', 'word_count', "INTEGER NOT NULL DEFAULT 0")
+    _add_column(connection, 'news_articles', 'reading_time', "INTEGER NOT NULL DEFAULT 1")
+    _add_column(connection, 'news_articles', 'excerpt', "VARCHAR(310)")
+
+
+@migration(2, 'Composite indexes for article listings and keyset pagination')
+def add_listing_indexes(connection):
+    connection.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_news_articles_published_created '
+        'ON news_articles (is_published, created_at)'
+    ))
+    connection.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_news_articles_created_id ON news_articles (created_at, id)'
+    ))
+    connection.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_news_subscribers_subscribed_id '
+        'ON news_subscribers (subscribed_at, id)'
+    ))
+
+
+@migration(3, 'Index for streaming active newsletter recipients')
+def add_recipient_index(connection):
+    connection.execute(text(
+        'CREATE INDEX IF NOT EXISTS ix_news_subscribers_active_id ON news_subscribers (is_active, id)'
+    ))
+
+
+@migration(4, 'Full-text search index for articles')
+def add_search_index(connection):
+    from search import SearchIndex
+    SearchIndex.create_schema(connection)
+
+
+def applied_versions(connection):
+    connection.execute(text(
+        'CREATE TABLE IF NOT EXISTS schema_migrations '
+        '(version INTEGER PRIMARY KEY, description VARCHAR(200), applied_at TIMESTAMP)'
+    ))
+    return {row[0] for row in connection.execute(text('SELECT version FROM schema_migrations'))}
+
+
+def upgrade():
+    """Apply pending migrations; returns the versions that were applied"""
+    applied = []
+    with db.engine.begin() as connection:
+        done = applied_versions(connection)
+    for version, description, func in sorted(MIGRATIONS, key=lambda item: item[0]):
+        if version in done:
+            continue
+        with db.engine.begin() as connection:
+            func(connection)
+            connection.execute(
+                text('INSERT INTO schema_migrations (version, description, applied_at) '
+                     'VALUES (:version, :description, :applied_at)'),
+                {'version': version, 'description': description, 'applied_at': datetime.utcnow()}
+            )
+        logger.info(f"Applied migration {version}: {description}")
+        applied.append(version)
+    return applied
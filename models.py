@@ -1,8 +1,21 @@
+import json
+import threading
+import time
+import uuid
 from datetime import datetime
-from app import db
+from app import app, db
+from db_routing import primary_reads
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import load_only, joinedload
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 300
+SETTINGS_VERSION_KEY = '_settings_version'
+ARTICLES_VERSION_KEY = '_articles_version'  # bumped by invalidate_article_caches()
+USERS_VERSION_KEY = '_users_version'  # bumped whenever a User is saved or deleted
+
 
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
@@ -41,6 +54,12 @@ class User(UserMixin, db.Model):
 
 class NewsArticle(db.Model):
     __tablename__ = 'news_articles'
+    __table_args__ = (
+        # Home page / feeds: published articles newest first
+        db.Index('ix_news_articles_published_created', 'is_published', 'created_at'),
+        # Admin keyset pagination
+        db.Index('ix_news_articles_created_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -50,6 +69,10 @@ class NewsArticle(db.Model):
     is_breaking = db.Column(db.Boolean, default=False, nullable=False)
     is_published = db.Column(db.Boolean, default=True, nullable=False)
     views_count = db.Column(db.Integer, default=0, nullable=False)
+    # Derived from content when the article is saved, so listings never read the body
+    word_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    reading_time = db.Column(db.Integer, default=1, server_default='1', nullable=False)
+    excerpt = db.Column(db.String(310), nullable=True)
     author_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -58,20 +81,59 @@ class NewsArticle(db.Model):
     def __repr__(self):
         return f'<NewsArticle {self.title}>'
     
-    @property
-    def reading_time(self):
-        """Calculate estimated reading time in minutes"""
-        word_count = len(self.content.split())
-        return max(1, round(word_count / 200))
-    
-    def increment_views(self):
-        """Increment view count"""
-        self.views_count += 1
-        db.session.commit()
+    @classmethod
+    def listing(cls, with_author=False):
+        """Query for list views: every column except the article body"""
+        query = cls.query.options(load_only(
+            cls.id, cls.title, cls.summary, cls.excerpt, cls.category,
+            cls.is_breaking, cls.is_published, cls.views_count, cls.word_count,
+            cls.reading_time, cls.author_id, cls.created_at, cls.updated_at,
+            cls.published_at
+        ))
+        if with_author:
+            query = query.options(joinedload(cls.author))
+        return query
+    
+    @staticmethod
+    def compute_text_stats(content):
+        """Word count, estimated reading time in minutes and a plain excerpt"""
+        content = content or ''
+        word_count = len(content.split())
+        excerpt = content[:EXCERPT_LENGTH]
+        if len(content) > EXCERPT_LENGTH:
+            excerpt += '...'
+        return {
+            'word_count': word_count,
+            'reading_time': max(1, round(word_count / WORDS_PER_MINUTE)),
+            'excerpt': excerpt
+        }
+    
+    def refresh_text_stats(self):
+        """Recompute the stored word count, reading time and excerpt"""
+        for key, value in NewsArticle.compute_text_stats(self.content).items():
+            setattr(self, key, value)
+
+
+@event.listens_for(NewsArticle, 'before_insert')
+def _article_before_insert(mapper, connection, target):
+    target.refresh_text_stats()
+
+
+@event.listens_for(NewsArticle, 'before_update')
+def _article_before_update(mapper, connection, target):
+    # Only re-split the body when it actually changed (not on view count bumps)
+    if inspect(target).attrs.content.history.has_changes() or target.excerpt is None:
+        target.refresh_text_stats()
 
 
 class NewsSubscriber(db.Model):
     __tablename__ = 'news_subscribers'
+    __table_args__ = (
+        # Admin keyset pagination
+        db.Index('ix_news_subscribers_subscribed_id', 'subscribed_at', 'id'),
+        # Newsletter recipients streamed in id order
+        db.Index('ix_news_subscribers_active_id', 'is_active', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
@@ -118,22 +180,217 @@ class SiteSettings(db.Model):
     def __repr__(self):
         return f'<SiteSettings {self.key}>'
     
+    @staticmethod
+    def all_settings():
+        """All settings as a dict, served from the in-process cache"""
+        return _settings_cache.load()
+    
     @staticmethod
     def get_setting(key, default=None):
         """Get a setting value"""
-        setting = SiteSettings.query.filter_by(key=key).first()
-        return setting.value if setting else default
+        return _settings_cache.load().get(key, default)
+    
+    @staticmethod
+    def set_settings(values, descriptions=None):
+        """Set several settings in one transaction and bump the settings version"""
+        descriptions = descriptions or {}
+        existing = {
+            setting.key: setting
+            for setting in SiteSettings.query.filter(
+                SiteSettings.key.in_(list(values) + [SETTINGS_VERSION_KEY])
+            ).all()
+        }
+        for key, value in list(values.items()) + [(SETTINGS_VERSION_KEY, uuid.uuid4().hex)]:
+            setting = existing.get(key)
+            if setting:
+                setting.value = value
+                if descriptions.get(key):
+                    setting.description = descriptions[key]
+            else:
+                setting = SiteSettings(key=key, value=value, description=descriptions.get(key))
+                db.session.add(setting)
+            existing[key] = setting
+        db.session.commit()
+        _settings_cache.invalidate()
+        return existing
     
     @staticmethod
     def set_setting(key, value, description=None):
         """Set a setting value"""
-        setting = SiteSettings.query.filter_by(key=key).first()
-        if setting:
-            setting.value = value
-            if description:
-                setting.description = description
-        else:
-            setting = SiteSettings(key=key, value=value, description=description)
-            db.session.add(setting)
-        db.session.commit()
-        return setting
\ No newline at end of file
+        return SiteSettings.set_settings({key: value}, {key: description})[key]
+
+
+class EmailJob(db.Model):
+    __tablename__ = 'email_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_type = db.Column(db.String(50), nullable=False)  # welcome_email, newsletter
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON encoded arguments
+    status = db.Column(db.String(20), default='queued', nullable=False, index=True)  # queued, running, done, failed
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    max_attempts = db.Column(db.Integer, default=5, nullable=False)
+    run_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+    locked_by = db.Column(db.String(100), nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+    result = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<EmailJob {self.id} {self.job_type} - {self.status}>'
+    
+    def to_dict(self):
+        """Serialize job status for the admin API"""
+        return {
+            'id': self.id,
+            'job_type': self.job_type,
+            'status': self.status,
+            'attempts': self.attempts,
+            'max_attempts': self.max_attempts,
+            'run_at': self.run_at.isoformat() if self.run_at else None,
+            'last_error': self.last_error,
+            'result': self.result,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class SettingsCache:
+    """Process-local copy of site_settings.
+
+    Every write stores a new random value under SETTINGS_VERSION_KEY. Readers
+    compare that single value at most every reload_seconds and reload all
+    rows when it changed, so other workers see new settings within that delay.
+    """
+    
+    def __init__(self, reload_seconds=5):
+        self.reload_seconds = reload_seconds
+        self._values = None
+        self._version = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+    
+    def load(self):
+        now = time.monotonic()
+        if self._values is not None and now - self._checked_at < self.reload_seconds:
+            return self._values
+        with self._lock:
+            if self._values is not None and now - self._checked_at < self.reload_seconds:
+                return self._values
+            if self._values is not None:
+                version = db.session.query(SiteSettings.value).filter_by(key=SETTINGS_VERSION_KEY).scalar()
+                if version == self._version:
+                    self._checked_at = now
+                    return self._values
+            values = dict(db.session.query(SiteSettings.key, SiteSettings.value).all())
+            self._version = values.pop(SETTINGS_VERSION_KEY, None)
+            for key in (ARTICLES_VERSION_KEY, USERS_VERSION_KEY):
+                values.pop(key, None)
+            self._values = values
+            self._checked_at = now
+            return values
+    
+    def invalidate(self):
+        with self._lock:
+            self._values = None
+
+
+_settings_cache = SettingsCache(app.config.get('SETTINGS_RELOAD_SECONDS', 5))
+
+
+class CacheVersion:
+    """Keeps a process-local cache in step across worker processes.
+
+    bump() stores a new random value under key in site_settings. sync()
+    compares that value at most every check_seconds and drops the cache's
+    entries (only those starting with prefix, if given) when it changed, so
+    other workers stop serving stale entries within that delay.
+    """
+    
+    def __init__(self, key, cache, check_seconds=5, prefix=None):
+        self.key = key
+        self.cache = cache
+        self.check_seconds = check_seconds
+        self.prefix = prefix
+        self._version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+    
+    def _fresh(self, now):
+        return self._checked_at is not None and now - self._checked_at < self.check_seconds
+    
+    def sync(self):
+        """Drop the cache if another process bumped the version; returns the current version"""
+        now = time.monotonic()
+        if self._fresh(now):
+            return self._version
+        with self._lock:
+            if self._fresh(now):
+                return self._version
+            # A lagging replica would hide the bump
+            with primary_reads():
+                version = db.session.query(SiteSettings.value).filter_by(key=self.key).scalar()
+            if version != self._version:
+                self.cache.invalidate(self.prefix)
+                self._version = version
+            self._checked_at = now
+            return version
+    
+    def bump(self, connection=None):
+        """Store a new version and commit it, or write it on connection inside a flush"""
+        version = uuid.uuid4().hex
+        table = SiteSettings.__table__
+        executor = db.session if connection is None else connection
+        updated = executor.execute(
+            table.update().where(table.c.key == self.key).values(value=version, updated_at=datetime.utcnow())
+        ).rowcount
+        if not updated:
+            executor.execute(table.insert().values(key=self.key, value=version, description='Cache version'))
+        if connection is None:
+            db.session.commit()
+        with self._lock:
+            self.cache.invalidate(self.prefix)
+            self._version = version
+            self._checked_at = time.monotonic()
+
+
+class NewsletterCampaign(db.Model):
+    __tablename__ = 'newsletter_campaigns'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    subject = db.Column(db.String(200), nullable=False)
+    article_ids = db.Column(db.Text, nullable=False)  # JSON list, snapshot taken at creation
+    status = db.Column(db.String(20), default='pending', nullable=False, index=True)  # pending, running, interrupted, completed
+    last_subscriber_id = db.Column(db.Integer, default=0, nullable=False)  # checkpoint: everyone up to here is done
+    sent_count = db.Column(db.Integer, default=0, nullable=False)
+    failed_count = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<NewsletterCampaign {self.id} - {self.status}>'
+    
+    @property
+    def article_id_list(self):
+        return json.loads(self.article_ids or '[]')
+    
+    def to_dict(self):
+        """Serialize campaign progress for the admin API"""
+        return {
+            'id': self.id,
+            'subject': self.subject,
+            'article_ids': self.article_id_list,
+            'status': self.status,
+            'last_subscriber_id': self.last_subscriber_id,
+            'sent_count': self.sent_count,
+            'failed_count': self.failed_count,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'heartbeat_at': self.heartbeat_at.isoformat() if self.heartbeat_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
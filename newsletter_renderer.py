@@ -0,0 +1,111 @@
+import html
+import threading
+from datetime import datetime
+from jinja2 import Template
+
+# Per-recipient values are substituted into the pre-rendered page at these markers
+UNSUBSCRIBE_MARKER = '%%UNSUBSCRIBE_URL%%'
+
+NEWSLETTER_TEMPLATE = """
+        <html>
+        <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px; background-color: #f8f9fa;">
+            <div style="background: linear-gradient(135deg, #0d6efd, #0056b3); color: white; padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
+                <h1 style="margin: 0; font-size: 28px;">📰 NewsFlash247</h1>
+                <p style="margin: 10px 0 0 0; font-size: 16px;">Daily News Digest - {{ date }}</p>
+            </div>
+            
+            <div style="background: white; padding: 30px; border-radius: 0 0 10px 10px;">
+                <h2 style="color: #333; margin-top: 0; border-bottom: 2px solid #0d6efd; padding-bottom: 10px;">
+                    Today's Top Stories
+                </h2>
+                
+                {% for article in articles %}
+                <div style="margin-bottom: 30px; padding-bottom: 20px; border-bottom: 1px solid #dee2e6;">
+                    {% if article.is_breaking %}
+                    <div style="background: #dc3545; color: white; padding: 5px 10px; border-radius: 15px; display: inline-block; font-size: 12px; font-weight: bold; margin-bottom: 10px;">
+                        🚨 BREAKING NEWS
+                    </div>
+                    {% endif %}
+                    
+                    <h3 style="color: #0d6efd; margin: 10px 0; font-size: 18px; line-height: 1.4;">
+                        {{ article.title }}
+                    </h3>
+                    
+                    <div style="background: #f8f9fa; padding: 15px; border-left: 4px solid #0d6efd; margin: 15px 0;">
+                        <p style="color: #666; margin: 0; line-height: 1.6;">
+                            {{ article.summary }}
+                        </p>
+                    </div>
+                    
+                    <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 15px;">
+                        <small style="color: #999;">
+                            📂 {{ article.category }} | 👁️ {{ article.views_count }} views | ⏱️ {{ article.reading_time }} min read
+                        </small>
+                        <small style="color: #999;">
+                            {{ article.created_label }}
+                        </small>
+                    </div>
+                </div>
+                {% endfor %}
+                
+                <div style="background: #0d6efd; color: white; padding: 20px; border-radius: 8px; text-align: center; margin-top: 30px;">
+                    <h3 style="margin: 0 0 10px 0;">Stay Connected</h3>
+                    <p style="margin: 0; font-size: 14px;">
+                        Visit NewsFlash247 for more breaking news and updates throughout the day.
+                    </p>
+                </div>
+                
+                <hr style="border: none; border-top: 1px solid #dee2e6; margin: 30px 0;">
+                
+                <p style="color: #999; font-size: 12px; text-align: center;">
+                    You're receiving this email because you subscribed to NewsFlash247 newsletter.<br>
+                    <a href="{{ unsubscribe_url }}" style="color: #999;">Unsubscribe</a><br>
+                    © 2025 NewsFlash247. All rights reserved.
+                </p>
+            </div>
+        </body>
+        </html>
+        """
+
+_compiled_template = None
+_compile_lock = threading.Lock()
+
+
+def get_newsletter_template():
+    """Compile the newsletter template once per process"""
+    global _compiled_template
+    if _compiled_template is None:
+        with _compile_lock:
+            if _compiled_template is None:
+                _compiled_template = Template(NEWSLETTER_TEMPLATE)
+    return _compiled_template
+
+
+def article_view(article):
+    """Template values for one article, computed once per campaign"""
+    return {
+        'title': article.title,
+        'summary': article.summary or article.excerpt,
+        'category': article.category,
+        'is_breaking': article.is_breaking,
+        'views_count': article.views_count,
+        'reading_time': article.reading_time,
+        'created_label': article.created_at.strftime('%B %d, %Y at %I:%M %p')
+    }
+
+
+class NewsletterRenderer:
+    """Renders the shared newsletter body once and fills in per-recipient links"""
+
+    def __init__(self, articles, date=None):
+        date = date or datetime.now()
+        skeleton = get_newsletter_template().render(
+            articles=[article_view(article) for article in articles],
+            date=date.strftime('%B %d, %Y'),
+            unsubscribe_url=UNSUBSCRIBE_MARKER
+        )
+        self._parts = skeleton.split(UNSUBSCRIBE_MARKER)
+
+    def render(self, unsubscribe_url='#'):
+        """HTML for one recipient, without running Jinja again"""
+        return html.escape(unsubscribe_url).join(self._parts)
@@ -0,0 +1,32 @@
+from app import app
+from db_routing import primary_reads
+from models import CacheVersion, ARTICLES_VERSION_KEY
+from ttl_cache import TTLCache
+
+
+# Rendered fragments for public pages
+page_cache = TTLCache(
+    maxsize=app.config.get('PAGE_CACHE_MAX_ENTRIES', 256),
+    ttl=app.config.get('PAGE_CACHE_TTL', 60)
+)
+
+# Lets every worker drop its 'articles:' entries within PAGE_CACHE_SYNC_SECONDS of a publish
+article_cache_version = CacheVersion(
+    ARTICLES_VERSION_KEY, page_cache, app.config.get('PAGE_CACHE_SYNC_SECONDS', 5), prefix='articles:'
+)
+
+
+def cached_articles(key, factory, ttl=None):
+    """page_cache.get_or_set for an 'articles:' key, after catching up with invalidations elsewhere.
+
+    The version check and the refill read from the primary: a replica that
+    hasn't caught up with the publish would otherwise cache the old page again.
+    """
+    with primary_reads():
+        article_cache_version.sync()
+        return page_cache.get_or_set(key, factory, ttl)
+
+
+def invalidate_article_caches():
+    """Forget everything rendered from article data after a create, edit or publish, in every process"""
+    article_cache_version.bump()
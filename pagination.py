@@ -0,0 +1,116 @@
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import and_, or_, func, text
+from app import db
+from ttl_cache import TTLCache
+
+# Approximate table sizes are refreshed at most once a minute
+_count_cache = TTLCache(maxsize=32, ttl=60)
+
+
+def encode_cursor(sort_value, row_id):
+    raw = f"{sort_value.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (datetime, id) from a cursor string, or None if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        sort_value, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(sort_value), int(row_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    """One page of a newest-first listing, addressed by cursors instead of OFFSET"""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def keyset_paginate(query, sort_column, id_column, after=None, before=None, per_page=20):
+    """Page through query ordered by (sort_column, id_column) descending.
+
+    `after` continues past the last row of a page (older rows), `before`
+    goes back towards newer rows. Both are cursors from a previous page.
+    """
+    position = decode_cursor(before or after) if (before or after) else None
+    backwards = bool(before) and position is not None
+
+    if position is not None:
+        sort_value, row_id = position
+        if backwards:
+            query = query.filter(or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > row_id)
+            )).order_by(sort_column.asc(), id_column.asc())
+        else:
+            query = query.filter(or_(
+                sort_column < sort_value,
+                and_(sort_column == sort_value, id_column < row_id)
+            )).order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+
+    # One extra row tells us whether there is another page
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def cursor_for(row):
+        return encode_cursor(getattr(row, sort_column.key), getattr(row, id_column.key))
+
+    next_cursor = prev_cursor = None
+    if rows:
+        if backwards:
+            next_cursor = cursor_for(rows[-1])
+            prev_cursor = cursor_for(rows[0]) if has_more else None
+        else:
+            next_cursor = cursor_for(rows[-1]) if has_more else None
+            prev_cursor = cursor_for(rows[0]) if position is not None else None
+
+    return KeysetPage(rows, per_page, next_cursor, prev_cursor)
+
+
+def approximate_count(model):
+    """Cheap row count estimate: planner statistics on Postgres, COUNT(*) elsewhere.
+
+    Admin listings only ask for it with PAGINATION_APPROXIMATE_TOTALS set.
+    """
+    table = model.__tablename__
+
+    def count():
+        if db.engine.dialect.name == 'postgresql':
+            estimate = db.session.execute(
+                text('SELECT reltuples::bigint FROM pg_class WHERE relname = :table'),
+                {'table': table}
+            ).scalar()
+            # -1 / 0 means the table has not been analyzed yet
+            if estimate and estimate > 0:
+                return int(estimate)
+        return db.session.query(func.count()).select_from(model).scalar()
+
+    return _count_cache.get_or_set(table, count)
@@ -0,0 +1,173 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from flask import g, request
+from flask_login import current_user
+
+logger = logging.getLogger(__name__)
+
+TOP_FUNCTIONS = 25
+
+
+def _slug(value):
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', value or 'unknown')[:60]
+
+
+def top_functions(profile, limit=TOP_FUNCTIONS):
+    """[{'function', 'calls', 'tottime', 'cumtime'}, ...] sorted by cumulative time"""
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (_, calls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f'{os.path.basename(filename)}:{line}({name})' if line else name,
+            'calls': calls,
+            'tottime': round(tottime * 1000, 2),
+            'cumtime': round(cumtime * 1000, 2),
+        })
+    rows.sort(key=lambda row: row['cumtime'], reverse=True)
+    return rows[:limit]
+
+
+class ProfileStore:
+    """Saved profiles: <name>.prof for pstats/snakeviz plus a <name>.json summary.
+
+    The directory is trimmed to max_files profiles and max_bytes on disk,
+    oldest first, every time a profile is saved.
+    """
+
+    def __init__(self, directory=None, max_files=50, max_bytes=50 * 1024 * 1024):
+        self.directory = directory
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+
+    def save(self, profile, label, duration, info=None):
+        os.makedirs(self.directory, exist_ok=True)
+        started = datetime.utcnow()
+        name = f"{started:%Y%m%d-%H%M%S-%f}-{_slug(label)}"
+        profile.dump_stats(os.path.join(self.directory, f'{name}.prof'))
+        summary = dict(info or {}, **{
+            'name': name,
+            'label': label,
+            'created_at': started.isoformat(),
+            'duration_ms': round(duration * 1000, 2),
+            'top': top_functions(profile),
+        })
+        with open(os.path.join(self.directory, f'{name}.json'), 'w') as f:
+            json.dump(summary, f)
+        self.trim()
+        return name
+
+    def _names(self):
+        try:
+            return sorted(
+                (entry[:-5] for entry in os.listdir(self.directory) if entry.endswith('.json')),
+                reverse=True
+            )
+        except FileNotFoundError:
+            return []
+
+    def trim(self):
+        total = 0
+        for index, name in enumerate(self._names()):
+            paths = [os.path.join(self.directory, f'{name}{suffix}') for suffix in ('.prof', '.json')]
+            total += sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+            if index >= self.max_files or total > self.max_bytes:
+                for path in paths:
+                    if os.path.exists(path):
+                        os.remove(path)
+
+    def recent(self, limit=50):
+        summaries = []
+        for name in self._names()[:limit]:
+            try:
+                with open(os.path.join(self.directory, f'{name}.json')) as f:
+                    summaries.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return summaries
+
+    def path(self, name):
+        """Filesystem path of a saved .prof file, or None for unknown names"""
+        if name not in self._names():
+            return None
+        return os.path.join(self.directory, f'{name}.prof')
+
+
+class RequestProfiler:
+    """Runs selected requests under cProfile.
+
+    An admin adds ?__profile=1 to any URL; PROFILE_SAMPLE_RATE additionally
+    profiles that share of all requests. Results go to the ProfileStore and
+    are listed at /admin/profiles.
+    """
+
+    def __init__(self):
+        self.store = ProfileStore()
+        self.sample_rate = 0.0
+
+    def init_app(self, app):
+        self.store.directory = app.config.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles')
+        self.store.max_files = app.config.get('PROFILE_MAX_FILES', 50)
+        self.store.max_bytes = app.config.get('PROFILE_MAX_BYTES', 50 * 1024 * 1024)
+        self.sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0.0)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+
+    def wanted(self):
+        if request.args.get('__profile') == '1':
+            return current_user.is_authenticated and current_user.is_admin
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _start(self):
+        if not self.wanted():
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Another profiler is already running in this thread
+            logger.warning(f"Request profiling skipped: {str(e)}")
+            return
+        g._profile = (profile, time.perf_counter())
+
+    def _finish(self, response):
+        running = g.pop('_profile', None)
+        if running is None:
+            return response
+        profile, started = running
+        profile.disable()
+        duration = time.perf_counter() - started
+        try:
+            name = self.store.save(profile, request.endpoint or 'unknown', duration, {
+                'path': request.full_path.rstrip('?'),
+                'method': request.method,
+                'status': response.status_code,
+            })
+            response.headers['X-Profile'] = name
+        except OSError as e:
+            logger.error(f"Failed to save profile: {str(e)}")
+        return response
+
+    @contextmanager
+    def profile(self, label, **info):
+        """Profile a block outside a request, e.g. a newsletter run from the CLI"""
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            name = self.store.save(profile, label, time.perf_counter() - started, info)
+            logger.info(f"Saved profile {name}")
+
+
+request_profiler = RequestProfiler()
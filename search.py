@@ -0,0 +1,170 @@
+import re
+import logging
+from sqlalchemy import text
+from app import db
+from models import NewsArticle
+
+logger = logging.getLogger(__name__)
+
+# Title matches count most, then the summary, then the body
+TITLE_WEIGHT, SUMMARY_WEIGHT, CONTENT_WEIGHT = 10.0, 5.0, 1.0
+
+_schema_ready = False
+
+
+def _dialect():
+    return db.engine.dialect.name
+
+
+class SearchIndex:
+    """Full-text index over published articles.
+
+    SQLite uses an FTS5 table keyed by article id; Postgres keeps a weighted
+    tsvector per article in article_search with a GIN index. Rows are written
+    by index_article() whenever an article is saved, and rebuild() refills
+    the index after bulk loads.
+    """
+
+    @staticmethod
+    def create_schema(connection):
+        dialect = connection.dialect.name
+        if dialect == 'sqlite':
+            connection.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS news_articles_fts "
+                "USING fts5(title, summary, content, tokenize='porter unicode61')"
+            ))
+        elif dialect == 'postgresql':
+            connection.execute(text(
+                'CREATE TABLE IF NOT EXISTS article_search ('
+                'article_id INTEGER PRIMARY KEY REFERENCES news_articles(id) ON DELETE CASCADE, '
+                'document TSVECTOR NOT NULL)'
+            ))
+            connection.execute(text(
+                'CREATE INDEX IF NOT EXISTS ix_article_search_document '
+                'ON article_search USING GIN (document)'
+            ))
+
+    @staticmethod
+    def ensure_schema():
+        """Create the index tables once per process (new databases skip migrations)"""
+        global _schema_ready
+        if not _schema_ready:
+            with db.engine.begin() as connection:
+                SearchIndex.create_schema(connection)
+            _schema_ready = True
+
+    @staticmethod
+    def _remove(article_id):
+        if _dialect() == 'sqlite':
+            db.session.execute(text('DELETE FROM news_articles_fts WHERE rowid = :id'), {'id': article_id})
+        elif _dialect() == 'postgresql':
+            db.session.execute(text('DELETE FROM article_search WHERE article_id = :id'), {'id': article_id})
+
+    @staticmethod
+    def _insert(rows):
+        """rows: dicts with id, title, summary, content"""
+        if not rows:
+            return
+        if _dialect() == 'sqlite':
+            db.session.execute(text(
+                'INSERT INTO news_articles_fts (rowid, title, summary, content) '
+                'VALUES (:id, :title, :summary, :content)'
+            ), rows)
+        elif _dialect() == 'postgresql':
+            db.session.execute(text(
+                "INSERT INTO article_search (article_id, document) VALUES (:id, "
+                "setweight(to_tsvector('english', coalesce(:title, '')), 'A') || "
+                "setweight(to_tsvector('english', coalesce(:summary, '')), 'B') || "
+                "setweight(to_tsvector('english', coalesce(:content, '')), 'D'))"
+            ), rows)
+
+    @staticmethod
+    def index_article(article):
+        """Bring one article's index entry in line with its saved state and commit"""
+        SearchIndex.ensure_schema()
+        try:
+            SearchIndex._remove(article.id)
+            if article.is_published:
+                SearchIndex._insert([{
+                    'id': article.id,
+                    'title': article.title,
+                    'summary': article.summary or '',
+                    'content': article.content
+                }])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to index article {article.id}: {str(e)}")
+
+    @staticmethod
+    def rebuild(batch_size=500):
+        """Re-index every published article; returns the number indexed"""
+        SearchIndex.ensure_schema()
+        if _dialect() == 'sqlite':
+            db.session.execute(text('DELETE FROM news_articles_fts'))
+        elif _dialect() == 'postgresql':
+            db.session.execute(text('DELETE FROM article_search'))
+        last_id = 0
+        total = 0
+        while True:
+            rows = db.session.query(
+                NewsArticle.id, NewsArticle.title, NewsArticle.summary, NewsArticle.content
+            ).filter(
+                NewsArticle.is_published.is_(True),
+                NewsArticle.id > last_id
+            ).order_by(NewsArticle.id).limit(batch_size).all()
+            if not rows:
+                break
+            SearchIndex._insert([
+                {'id': row.id, 'title': row.title, 'summary': row.summary or '', 'content': row.content}
+                for row in rows
+            ])
+            last_id = rows[-1].id
+            total += len(rows)
+        db.session.commit()
+        return total
+
+    @staticmethod
+    def search(query, category=None, limit=20, offset=0):
+        """Ranked published articles matching query, best match first"""
+        terms = re.findall(r'\w+', query or '')
+        if not terms:
+            return []
+        SearchIndex.ensure_schema()
+        params = {'limit': limit, 'offset': offset, 'category': category}
+        category_filter = 'AND a.category = :category' if category else ''
+
+        if _dialect() == 'sqlite':
+            # Quote every term so user input can never be read as FTS5 syntax
+            params['q'] = ' '.join(f'"{term}"' for term in terms)
+            sql = (
+                'SELECT a.id FROM news_articles_fts f JOIN news_articles a ON a.id = f.rowid '
+                f'WHERE news_articles_fts MATCH :q AND a.is_published = 1 {category_filter} '
+                f'ORDER BY bm25(news_articles_fts, {TITLE_WEIGHT}, {SUMMARY_WEIGHT}, {CONTENT_WEIGHT}) '
+                'LIMIT :limit OFFSET :offset'
+            )
+        elif _dialect() == 'postgresql':
+            params['q'] = ' '.join(terms)
+            sql = (
+                "SELECT a.id FROM article_search s JOIN news_articles a ON a.id = s.article_id, "
+                "websearch_to_tsquery('english', :q) query "
+                f"WHERE s.document @@ query AND a.is_published {category_filter} "
+                "ORDER BY ts_rank_cd(s.document, query) DESC, a.created_at DESC "
+                "LIMIT :limit OFFSET :offset"
+            )
+        else:
+            # No full-text support: match titles and summaries only
+            like = NewsArticle.listing().filter(
+                NewsArticle.is_published.is_(True),
+                *[(NewsArticle.title.ilike(f'%{term}%') | NewsArticle.summary.ilike(f'%{term}%'))
+                  for term in terms]
+            )
+            if category:
+                like = like.filter(NewsArticle.category == category)
+            return like.order_by(NewsArticle.created_at.desc()).limit(limit).offset(offset).all()
+
+        ids = [row[0] for row in db.session.execute(text(sql), params)]
+        if not ids:
+            return []
+        articles = {article.id: article for article in NewsArticle.listing().filter(NewsArticle.id.in_(ids))}
+        return [articles[article_id] for article_id in ids if article_id in articles]
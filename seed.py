@@ -0,0 +1,94 @@
+import logging
+from datetime import datetime
+from app import db
+from models import User, NewsArticle
+from search import SearchIndex
+import migrations
+
+
+def init_db():
+    """Create missing tables and record the migrations they already include"""
+    # Replicas (SQLALCHEMY_BINDS) receive their schema from the primary
+    db.create_all(bind_key=None)
+    applied = migrations.upgrade()
+    logging.info("Database tables created")
+    return applied
+
+
+def seed_database():
+    """Create the admin user and sample articles on an empty database; returns True if seeded"""
+    # Create admin user if none exists
+    admin = User.query.filter_by(is_admin=True).first()
+    if admin:
+        return False
+    admin_user = User(
+        email='admin@newsflash247.com',
+        first_name='Admin',
+        last_name='User',
+        is_admin=True
+    )
+    admin_user.set_password('admin123')
+    
+    try:
+        db.session.add(admin_user)
+        db.session.commit()
+        logging.info("Admin user created: admin@newsflash247.com / admin123")
+        
+        # Create sample articles
+        sample_articles = [
+            {
+                'title': 'Tech Innovation Summit 2025 Announces Breakthrough AI Developments',
+                'content': 'Leading technology companies unveiled groundbreaking artificial intelligence solutions at this year\'s summit, promising to revolutionize healthcare, education, and sustainable energy sectors. The innovations showcase practical applications that could transform how we interact with technology in our daily lives.',
+                'summary': 'Leading tech companies reveal groundbreaking AI solutions at the 2025 summit.',
+                'category': 'Technology',
+                'is_breaking': True,
+                'is_published': True
+            },
+            {
+                'title': 'Global Climate Initiative Reaches Historic Milestone',
+                'content': 'International cooperation efforts have successfully reduced carbon emissions by 15% this quarter, marking significant progress toward the 2030 sustainability goals. This achievement represents unprecedented collaboration between nations and demonstrates the effectiveness of coordinated environmental policies.',
+                'summary': 'International efforts reduce carbon emissions by 15% this quarter.',
+                'category': 'Environment',
+                'is_breaking': False,
+                'is_published': True
+            },
+            {
+                'title': 'Economic Markets Show Strong Recovery Signals',
+                'content': 'Financial analysts report positive trends across major stock exchanges, with renewable energy and healthcare sectors leading the growth trajectory. Market confidence continues to strengthen as investors respond to sustainable business practices and innovative healthcare solutions.',
+                'summary': 'Financial markets show positive trends with renewable energy leading growth.',
+                'category': 'Business',
+                'is_breaking': False,
+                'is_published': True
+            },
+            {
+                'title': 'Educational Reform Initiative Launches Nationwide',
+                'content': 'New educational programs focusing on digital literacy and critical thinking skills are being implemented across public schools, aiming to prepare students for the evolving job market. The comprehensive reform includes teacher training, curriculum updates, and technology integration.',
+                'summary': 'National education reform focuses on digital literacy and critical thinking.',
+                'category': 'Education',
+                'is_breaking': False,
+                'is_published': True
+            }
+        ]
+        
+        for article_data in sample_articles:
+            article = NewsArticle(
+                title=article_data['title'],
+                content=article_data['content'],
+                summary=article_data['summary'],
+                category=article_data['category'],
+                is_breaking=article_data['is_breaking'],
+                is_published=article_data['is_published'],
+                author_id=admin_user.id,
+                published_at=datetime.utcnow()
+            )
+            db.session.add(article)
+        
+        db.session.commit()
+        SearchIndex.rebuild()
+        logging.info("Sample articles created")
+        return True
+    
+    except Exception as e:
+        db.session.rollback()
+        logging.error(f"Failed to seed database: {str(e)}")
+        return False
@@ -0,0 +1,116 @@
+import smtplib
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Errors after which the session is assumed dead and must be reopened
+# (smtplib.SMTPException is itself an OSError subclass)
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, OSError)
+
+
+class SMTPConnection:
+    """A single authenticated SMTP session that is recycled after a message budget"""
+
+    def __init__(self, host, port, username, password, use_tls=True, max_messages=100, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self.server = None
+
+        # Throughput counters (kept across reconnects)
+        self.messages_sent = 0
+        self.failures = 0
+        self.connects = 0
+        self.send_seconds = 0.0
+        self._session_messages = 0
+
+    @property
+    def is_connected(self):
+        return self.server is not None
+
+    def connect(self):
+        """Open, secure and authenticate a new SMTP session"""
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username and self.password:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.connects += 1
+        self._session_messages = 0
+
+    def close(self):
+        """Close the session, ignoring errors from an already broken connection"""
+        if self.server is None:
+            return
+        try:
+            self.server.quit()
+        except Exception:
+            try:
+                self.server.close()
+            except Exception:
+                pass
+        self.server = None
+
+    def send(self, msg):
+        """Send a message, reconnecting once if the session was dropped"""
+        for attempt in range(2):
+            if self.server is None:
+                self.connect()
+            started = time.perf_counter()
+            try:
+                self.server.send_message(msg)
+            except smtplib.SMTPRecipientsRefused:
+                # The session itself is still usable
+                self.failures += 1
+                raise
+            except smtplib.SMTPResponseException as e:
+                # Server rejected this message; 421 means it is closing the session
+                self.failures += 1
+                if e.smtp_code == 421:
+                    self.close()
+                raise
+            except RECONNECT_ERRORS:
+                self.close()
+                if attempt:
+                    self.failures += 1
+                    raise
+                logger.info(f"SMTP session to {self.host} dropped, reconnecting")
+                continue
+            except Exception:
+                self.failures += 1
+                self.close()
+                raise
+            self.send_seconds += time.perf_counter() - started
+            self.messages_sent += 1
+            self._session_messages += 1
+
+            # Recycle the session once its message budget is used up
+            if self.max_messages and self._session_messages >= self.max_messages:
+                self.close()
+            return
+
+    @property
+    def throughput(self):
+        """Messages per second spent inside send_message"""
+        if not self.send_seconds:
+            return 0.0
+        return self.messages_sent / self.send_seconds
+
+    def stats(self):
+        return {
+            'messages_sent': self.messages_sent,
+            'failures': self.failures,
+            'connects': self.connects,
+            'send_seconds': round(self.send_seconds, 3),
+            'msgs_per_sec': round(self.throughput, 2)
+        }
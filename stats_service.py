@@ -0,0 +1,57 @@
+from datetime import datetime
+from sqlalchemy import func, case
+from app import app, db
+from models import NewsArticle, NewsSubscriber, EmailLog
+from ttl_cache import TTLCache
+
+# Short-lived, so every admin view in a burst of clicks shares one computation
+_stats_cache = TTLCache(maxsize=4, ttl=app.config.get('STATS_CACHE_SECONDS', 5))
+
+
+def _count_if(condition):
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+class StatsService:
+    @staticmethod
+    def get_stats():
+        """Dashboard figures for articles, subscribers and email, cached for a few seconds"""
+        return _stats_cache.get_or_set('stats', StatsService.compute_stats)
+
+    @staticmethod
+    def compute_stats():
+        """One conditional-aggregate query per table"""
+        articles = db.session.query(
+            func.count(NewsArticle.id),
+            _count_if(NewsArticle.is_published.is_(True)),
+            _count_if(NewsArticle.is_published.is_(True) & NewsArticle.is_breaking.is_(True)),
+            func.coalesce(func.sum(NewsArticle.views_count), 0)
+        ).one()
+
+        subscribers = db.session.query(
+            func.count(NewsSubscriber.id),
+            _count_if(NewsSubscriber.is_active.is_(True))
+        ).one()
+
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+        emails = db.session.query(
+            _count_if(EmailLog.status == 'sent'),
+            _count_if(EmailLog.status == 'failed'),
+            _count_if((EmailLog.status == 'sent') & (EmailLog.sent_at >= today))
+        ).one()
+
+        return {
+            'total_articles': articles[0],
+            'published_articles': articles[1],
+            'breaking_news': articles[2],
+            'total_views': articles[3],
+            'all_subscribers': subscribers[0],
+            'total_subscribers': subscribers[1],
+            'emails_sent': emails[0],
+            'failed_emails': emails[1],
+            'emails_sent_today': emails[2]
+        }
+
+    @staticmethod
+    def invalidate():
+        _stats_cache.invalidate()
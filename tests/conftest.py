@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# app.py reads its configuration at import time
+_db_dir = tempfile.mkdtemp(prefix='newsflash247-tests-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_db_dir, 'test.db')}"
+os.environ['MAIL_USERNAME'] = 'newsletter@example.com'
+os.environ['MAIL_PASSWORD'] = 'secret'
+os.environ['JOBS_IN_PROCESS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app as flask_app, db  # noqa: E402
+import main  # noqa: E402,F401  (registers the routes)
+from benchmarks.smtp_sink import SMTPSink  # noqa: E402
+from seed import init_db, seed_database  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def smtp_sink():
+    sink = SMTPSink().start()
+    yield sink
+    sink.stop()
+
+
+@pytest.fixture(scope='session')
+def app(smtp_sink):
+    flask_app.config.update(
+        TESTING=True,
+        MAIL_SERVER='127.0.0.1',
+        MAIL_PORT=smtp_sink.port,
+        MAIL_USE_TLS=False,
+    )
+    with flask_app.app_context():
+        init_db()
+        seed_database()
+    return flask_app
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+        db.session.remove()
@@ -0,0 +1,101 @@
+import secrets
+
+import pytest
+from sqlalchemy import func, select
+
+from app import db
+from campaigns import CampaignService
+from delivery import DeliveryEngine
+from email_log_buffer import EmailLogBuffer
+from email_service import EmailService
+from models import EmailLog, NewsletterCampaign, NewsSubscriber
+
+SUBSCRIBERS = 50
+CHUNK_SIZE = 20
+
+
+@pytest.fixture
+def campaign(app, app_context):
+    app.config['EMAIL_LOG_CHUNK_SIZE'] = CHUNK_SIZE
+    for model in (EmailLog, NewsletterCampaign, NewsSubscriber):
+        db.session.query(model).delete()
+    db.session.add_all(
+        NewsSubscriber(email=f'reader{n}@example.com', subscription_token=secrets.token_urlsafe(16))
+        for n in range(SUBSCRIBERS)
+    )
+    db.session.commit()
+    return CampaignService.create_campaign()
+
+
+def committed_state(campaign_id):
+    """Sent log rows and the campaign checkpoint as another connection sees them"""
+    with db.engine.connect() as connection:
+        logged = connection.scalar(
+            select(func.count()).select_from(EmailLog).where(EmailLog.status == 'sent')
+        )
+        checkpoint = connection.execute(
+            select(NewsletterCampaign.sent_count, NewsletterCampaign.last_subscriber_id)
+            .where(NewsletterCampaign.id == campaign_id)
+        ).one()
+    return logged, checkpoint.sent_count, checkpoint.last_subscriber_id
+
+
+def test_checkpoint_commits_with_chunk_logs(campaign, monkeypatch):
+    snapshots = []
+    flush = EmailLogBuffer.flush
+
+    def flush_and_snapshot(self):
+        flush(self)
+        snapshots.append(committed_state(campaign.id))
+
+    monkeypatch.setattr(EmailLogBuffer, 'flush', flush_and_snapshot)
+    CampaignService.run(campaign.id)
+
+    subscriber_ids = [row.id for row in NewsSubscriber.query.order_by(NewsSubscriber.id)]
+    chunk_ends = subscriber_ids[CHUNK_SIZE - 1::CHUNK_SIZE] + [subscriber_ids[-1]]
+    expected = [(min(n * CHUNK_SIZE, SUBSCRIBERS), min(n * CHUNK_SIZE, SUBSCRIBERS), last_id)
+                for n, last_id in enumerate(chunk_ends, start=1)]
+    # Every chunk flush, and the final one on close, leaves logs and checkpoint in step
+    assert snapshots == expected + expected[-1:]
+
+
+def test_crash_leaves_checkpoint_matching_logs(campaign, monkeypatch):
+    record_deliveries = EmailService.record_deliveries
+    calls = []
+
+    def fail_second_chunk(ids, sent_at=None):
+        calls.append(ids)
+        if len(calls) == 2:
+            raise RuntimeError('worker died')
+        return record_deliveries(ids, sent_at)
+
+    monkeypatch.setattr(EmailService, 'record_deliveries', staticmethod(fail_second_chunk))
+    with pytest.raises(RuntimeError):
+        CampaignService.run(campaign.id)
+
+    logged, sent_count, last_subscriber_id = committed_state(campaign.id)
+    assert logged == sent_count == CHUNK_SIZE
+    assert last_subscriber_id == max(calls[0])
+    # The interrupted chunk is left reserved, not recorded as delivered
+    assert EmailLog.query.filter_by(status='pending').count() == CHUNK_SIZE
+    assert db.session.get(NewsletterCampaign, campaign.id).status == 'interrupted'
+
+
+def test_slow_chunk_keeps_campaign_claimed(app, smtp_sink, campaign, monkeypatch):
+    # One chunk takes about 3s, longer than the stale threshold
+    monkeypatch.setitem(app.config, 'EMAIL_LOG_CHUNK_SIZE', SUBSCRIBERS)
+    monkeypatch.setitem(app.config, 'NEWSLETTER_CONCURRENCY', 1)
+    monkeypatch.setitem(app.config, 'CAMPAIGN_STALE_SECONDS', 2)
+    monkeypatch.setattr(smtp_sink, 'delay', 0.06)
+    wait_for_results = DeliveryEngine.wait_for_results
+    second_claims = []
+
+    def wait_then_claim(self, count):
+        results = wait_for_results(self, count)
+        second_claims.append(CampaignService.claim(campaign.id))
+        return results
+
+    monkeypatch.setattr(DeliveryEngine, 'wait_for_results', wait_then_claim)
+    CampaignService.run(campaign.id)
+
+    assert second_claims == [None]
@@ -0,0 +1,27 @@
+import gzip
+
+import pytest
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_compressed_response_gets_a_weak_etag(client):
+    identity = client.get('/api/articles')
+    compressed = client.get('/api/articles', headers={'Accept-Encoding': 'gzip'})
+
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == identity.data
+    assert not identity.headers['ETag'].startswith('W/')
+    assert compressed.headers['ETag'] == f"W/{identity.headers['ETag']}"
+
+
+def test_weak_etag_revalidates(client):
+    etag = client.get('/api/articles', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+    response = client.get('/api/articles', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+
+from delivery import DeliveryEngine
+
+
+class FakeConnection:
+    connects = 0
+
+    def __init__(self, fail_with=None):
+        self.fail_with = fail_with
+
+    def send(self, msg):
+        if self.fail_with:
+            raise self.fail_with
+
+    def close(self):
+        pass
+
+    def stats(self):
+        return {}
+
+
+def test_wait_for_results_returns_every_outcome():
+    with DeliveryEngine(FakeConnection, concurrency=2) as engine:
+        for n in range(10):
+            engine.submit(n, 'message')
+        results = engine.wait_for_results(10)
+    assert sorted(key for key, error in results) == list(range(10))
+    assert all(error is None for key, error in results)
+
+
+@pytest.mark.filterwarnings('ignore::pytest.PytestUnhandledThreadExceptionWarning')
+def test_wait_for_results_raises_when_a_sender_dies():
+    # SystemExit escapes the per-message error handling and ends the thread
+    with pytest.raises(RuntimeError, match='sender thread died'):
+        with DeliveryEngine(lambda: FakeConnection(SystemExit()), concurrency=1) as engine:
+            engine.submit(1, 'message')
+            engine.wait_for_results(1)
+
+
+def test_wait_for_results_gives_up_on_a_stalled_send():
+    engine = DeliveryEngine(FakeConnection, concurrency=1, result_timeout=0.5)
+    with pytest.raises(RuntimeError, match='No delivery outcome'):
+        with engine:
+            engine.wait_for_results(1)
+
+
+class SlowConnection(FakeConnection):
+    def send(self, msg):
+        time.sleep(0.2)
+
+
+def test_close_forgets_unsent_messages():
+    engine = DeliveryEngine(SlowConnection, concurrency=1)
+    with engine:
+        for n in range(5):
+            engine.submit(n, 'message')
+    progress = engine.progress.to_dict()
+    assert progress['queued'] == 0
+    assert progress['sent'] + progress['failed'] < 5
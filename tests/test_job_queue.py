@@ -0,0 +1,67 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import db
+from job_queue import JobQueue, job_handler
+from models import EmailJob
+
+
+@pytest.fixture
+def jobs(app_context):
+    EmailJob.query.delete()
+    db.session.commit()
+
+
+@job_handler('test_sleep')
+def sleep_job(payload):
+    time.sleep(payload['seconds'])
+    with db.engine.connect() as connection:
+        locked_at = connection.scalar(select(EmailJob.locked_at).where(EmailJob.id == payload['job_id']))
+    return {'locked_at': locked_at.isoformat()}
+
+
+def running_job(attempts, max_attempts, locked_for):
+    job = JobQueue.enqueue('test_sleep', max_attempts=max_attempts)
+    job.status = 'running'
+    job.attempts = attempts
+    job.locked_at = datetime.utcnow() - timedelta(seconds=locked_for)
+    job.locked_by = 'dead-worker'
+    db.session.commit()
+    return job.id
+
+
+def test_stale_job_without_attempts_left_fails_instead_of_rerunning(jobs):
+    spent = running_job(attempts=1, max_attempts=1, locked_for=1000)
+    retryable = running_job(attempts=1, max_attempts=3, locked_for=1000)
+    live = running_job(attempts=1, max_attempts=1, locked_for=10)
+
+    assert JobQueue.requeue_stale(900) == 1
+    db.session.expire_all()
+    assert db.session.get(EmailJob, spent).status == 'failed'
+    assert db.session.get(EmailJob, retryable).status == 'queued'
+    assert db.session.get(EmailJob, live).status == 'running'
+
+
+def test_claim_skips_jobs_without_attempts_left(jobs):
+    job = JobQueue.enqueue('test_sleep', {'seconds': 0}, max_attempts=1)
+    job.attempts = 1
+    db.session.commit()
+    assert JobQueue.claim('worker') is None
+
+
+def test_heartbeat_keeps_a_long_job_locked(jobs):
+    job = JobQueue.enqueue('test_sleep', max_attempts=1)
+    job.payload = f'{{"seconds": 2.5, "job_id": {job.id}}}'
+    db.session.commit()
+    job = JobQueue.claim('worker')
+    claimed_at = job.locked_at
+
+    JobQueue.run(job, lock_timeout=3)
+
+    assert job.status == 'done'
+    # Seen from another connection while the handler was still running
+    assert datetime.fromisoformat(json.loads(job.result)['locked_at']) > claimed_at
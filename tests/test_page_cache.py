@@ -0,0 +1,41 @@
+from flask import g
+
+from db_routing import replica_router
+from models import ARTICLES_VERSION_KEY, CacheVersion
+from page_cache import cached_articles, invalidate_article_caches, page_cache
+from ttl_cache import TTLCache
+
+
+def test_invalidation_reaches_other_processes(app_context):
+    # Another worker's cache, checking the shared version on every read
+    other = CacheVersion(ARTICLES_VERSION_KEY, TTLCache(), check_seconds=0, prefix='articles:')
+    other.sync()
+    other.cache.set('articles:home', 'before publish')
+    other.cache.set('user:1', 'unrelated')
+
+    invalidate_article_caches()
+    other.sync()
+
+    assert other.cache.get('articles:home') is None
+    assert other.cache.get('user:1') == 'unrelated'
+
+
+def test_cached_articles_refills_after_invalidation(app_context):
+    assert cached_articles('articles:test', lambda: 'first') == 'first'
+    assert cached_articles('articles:test', lambda: 'second') == 'first'
+    invalidate_article_caches()
+    assert cached_articles('articles:test', lambda: 'third') == 'third'
+    page_cache.delete('articles:test')
+
+
+def test_cached_articles_refills_from_the_primary(app, monkeypatch):
+    monkeypatch.setattr(replica_router, 'names', ['replica_0'])
+    seen = []
+    with app.test_request_context('/'):
+        g.replica_reads = True
+        assert replica_router.reads_allowed()
+        invalidate_article_caches()
+        cached_articles('articles:test', lambda: seen.append(replica_router.reads_allowed()))
+        assert seen == [False]
+        assert replica_router.reads_allowed()
+    page_cache.delete('articles:test')
@@ -0,0 +1,47 @@
+from flask import session
+
+from app import db
+from models import User
+from user_cache import SESSION_KEY, UserCache
+
+
+def set_admin(user_id, is_admin):
+    db.session.get(User, user_id).is_admin = is_admin
+    db.session.commit()
+
+
+def test_demotion_reaches_other_processes(app):
+    # Another worker's cache, checking the shared version on every load
+    other = UserCache(check_seconds=0)
+    with app.test_request_context('/'):
+        admin_id = User.query.filter_by(is_admin=True).first().id
+        assert other.load(admin_id).is_admin
+        db.session.remove()
+
+        set_admin(admin_id, False)
+        try:
+            db.session.remove()
+            assert not other.load(admin_id).is_admin
+        finally:
+            set_admin(admin_id, True)
+
+
+def test_session_snapshot_is_written_only_when_it_changes(app):
+    cache = UserCache(session_snapshot=True, check_seconds=0)
+    with app.test_request_context('/'):
+        admin_id = User.query.filter_by(is_admin=True).first().id
+        cache.load(admin_id)
+        assert session[SESSION_KEY]['is_admin']
+
+        session.modified = False
+        cache.load(admin_id)
+        assert not session.modified
+
+        set_admin(admin_id, False)
+        try:
+            db.session.remove()
+            assert not cache.load(admin_id).is_admin
+            assert session.modified
+            assert not session[SESSION_KEY]['is_admin']
+        finally:
+            set_admin(admin_id, True)
@@ -0,0 +1,39 @@
+import pytest
+
+from app import db
+from models import NewsArticle, User
+from stats_service import StatsService
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def test_unknown_feed_category_is_not_found(client):
+    response = client.get('/category/no-such-category/feed.rss')
+    assert response.status_code == 404
+    assert b'Page Not Found' in response.data
+
+
+def test_draft_is_not_found_for_visitors(app, client):
+    with app.app_context():
+        author = User.query.filter_by(is_admin=True).first()
+        draft = NewsArticle(title='Draft', content='Not yet', author_id=author.id, is_published=False)
+        db.session.add(draft)
+        db.session.commit()
+        draft_id = draft.id
+    assert client.get(f'/article/{draft_id}').status_code == 404
+
+
+def test_unknown_profile_is_not_found(client):
+    client.post('/login', data={'email': 'admin@newsflash247.com', 'password': 'admin123'})
+    assert client.get('/admin/profiles/no-such-profile.prof').status_code == 404
+
+
+def test_subscribing_refreshes_dashboard_stats(app, client):
+    with app.app_context():
+        before = StatsService.get_stats()['total_subscribers']
+    client.post('/subscribe', data={'email': 'stats-refresh@example.com'})
+    with app.app_context():
+        assert StatsService.get_stats()['total_subscribers'] == before + 1
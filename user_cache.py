@@ -0,0 +1,91 @@
+from flask import session
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
+from app import app, db
+from db_routing import primary_reads
+from models import User, CacheVersion, USERS_VERSION_KEY
+from ttl_cache import TTLCache
+
+SESSION_KEY = '_user_snapshot'
+
+# Columns needed to authorize a request; anything else (password hash,
+# timestamps) is loaded lazily if a view actually touches it
+SNAPSHOT_FIELDS = ('id', 'email', 'first_name', 'last_name', 'is_admin', 'is_active')
+
+
+class UserCache:
+    """Identity cache for Flask-Login's user_loader.
+
+    Users are kept as plain column snapshots in a process-local TTL/LRU cache
+    and re-attached to the request's session with merge(load=False), so a
+    cache hit issues no SELECT. Saving or deleting any User bumps
+    USERS_VERSION_KEY; every process checks it at most every check_seconds
+    and starts over when it changed, so a demoted or deactivated user loses
+    access in all workers within that delay. With session_snapshot enabled
+    the snapshot also rides in the signed session cookie, tagged with that
+    version, which spares the other worker processes the lookup as well.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, session_snapshot=False, check_seconds=5):
+        self.session_snapshot = session_snapshot
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.version = CacheVersion(USERS_VERSION_KEY, self._cache, check_seconds)
+
+    @staticmethod
+    def snapshot(user):
+        return {field: getattr(user, field) for field in SNAPSHOT_FIELDS}
+
+    @staticmethod
+    def attach(snapshot):
+        user = User(**{field: snapshot[field] for field in SNAPSHOT_FIELDS})
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    @staticmethod
+    def _from_session(user_id, version):
+        stored = session.get(SESSION_KEY)
+        if not stored or stored.get('id') != user_id or stored.get('version') != version:
+            return None
+        return stored
+
+    def load(self, user_id):
+        version = self.version.sync()
+        if self.session_snapshot:
+            stored = self._from_session(user_id, version)
+            if stored:
+                return self.attach(stored)
+
+        snapshot = self._cache.get(user_id)
+        if snapshot is None:
+            with primary_reads():
+                user = db.session.get(User, user_id)
+            if user is None:
+                return None
+            snapshot = self.snapshot(user)
+            self._cache.set(user_id, snapshot)
+        else:
+            user = self.attach(snapshot)
+
+        if self.session_snapshot:
+            # Only reached when the cookie holds no snapshot for this version,
+            # so the cookie is rewritten once per change rather than per request
+            session[SESSION_KEY] = dict(snapshot, version=version)
+        return user
+
+    def clear_session(self):
+        session.pop(SESSION_KEY, None)
+
+
+user_cache = UserCache(
+    maxsize=app.config.get('USER_CACHE_MAX_ENTRIES', 1024),
+    ttl=app.config.get('USER_CACHE_TTL', 60),
+    session_snapshot=app.config.get('USER_SESSION_SNAPSHOT', False),
+    check_seconds=app.config.get('USER_CACHE_SYNC_SECONDS', 5)
+)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    # Written in the same transaction as the change itself
+    user_cache.version.bump(connection)
@@ -0,0 +1,104 @@
+import atexit
+import threading
+import logging
+from collections import Counter
+from sqlalchemy import update, bindparam
+from app import app, db
+from models import NewsArticle
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounterBuffer:
+    """Collects article page views in memory and writes them as batched increments"""
+
+    def __init__(self, flush_interval=10.0, max_pending=500):
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._counts = Counter()
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def record(self, article_id, views=1):
+        with self._lock:
+            self._counts[article_id] += views
+            self._pending += views
+            full = self._pending >= self.max_pending
+        if full:
+            self.flush()
+
+    def pending(self, article_id):
+        """Views recorded for an article but not yet written"""
+        with self._lock:
+            return self._counts.get(article_id, 0)
+
+    def flush(self):
+        """Apply buffered views with one atomic increment per article; needs an app context"""
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+                self._pending = 0
+            if not counts:
+                return 0
+            table = NewsArticle.__table__
+            statement = update(table).where(table.c.id == bindparam('_id')).values(
+                views_count=table.c.views_count + bindparam('_views'),
+                # A page view is not an edit
+                updated_at=table.c.updated_at
+            )
+            try:
+                db.session.execute(statement, [
+                    {'_id': article_id, '_views': views} for article_id, views in counts.items()
+                ])
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                with self._lock:
+                    self._counts.update(counts)
+                    self._pending += sum(counts.values())
+                logger.error(f"Failed to flush article view counts: {str(e)}")
+                return 0
+            return sum(counts.values())
+
+    def start(self):
+        """Flush periodically from a daemon thread"""
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._loop, name='view-counter-flush', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.flush_in_app_context()
+
+    def flush_in_app_context(self):
+        with app.app_context():
+            return self.flush()
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush_in_app_context()
+            except Exception as e:
+                logger.error(f"View counter flush error: {str(e)}")
+
+
+view_counter = ViewCounterBuffer(
+    flush_interval=app.config.get('VIEW_COUNTER_FLUSH_INTERVAL', 10),
+    max_pending=app.config.get('VIEW_COUNTER_MAX_PENDING', 500)
+)
+
+
+@atexit.register
+def _flush_on_shutdown():
+    """Write pending views when the worker exits"""
+    try:
+        view_counter.stop()
+    except Exception as e:
+        logger.error(f"Article view counts lost on shutdown: {str(e)}")